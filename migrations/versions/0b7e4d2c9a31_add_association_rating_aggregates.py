@@ -0,0 +1,34 @@
+"""add denormalized rating_sum and rating_count to associations
+
+Revision ID: 0b7e4d2c9a31
+Revises: f6c2a9e4b813
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7e4d2c9a31'
+down_revision = 'f6c2a9e4b813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('associations', sa.Column('rating_sum', sa.Float(), server_default='0', nullable=False))
+    op.add_column('associations', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Rellenar los contadores con las valoraciones existentes
+    op.execute(
+        "UPDATE associations SET "
+        "rating_sum = (SELECT coalesce(sum(rating), 0) FROM ratings WHERE ratings.association_id = associations.id), "
+        "rating_count = (SELECT count(*) FROM ratings WHERE ratings.association_id = associations.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('associations', schema=None) as batch_op:
+        batch_op.drop_column('rating_count')
+        batch_op.drop_column('rating_sum')
@@ -0,0 +1,37 @@
+"""add association_type and city to associations
+
+Revision ID: 2c6d8e0f4a19
+Revises: 8a4f6e2d0c57
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c6d8e0f4a19'
+down_revision = '8a4f6e2d0c57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('associations', sa.Column('association_type', sa.String(length=100), nullable=True))
+    op.add_column('associations', sa.Column('city', sa.String(length=100), nullable=True))
+
+    op.create_index('ix_associations_association_type', 'associations', ['association_type'], unique=False)
+    op.create_index('ix_associations_name_id', 'associations', ['name', 'id'], unique=False)
+    # pg_trgm ya se instala en la migración de búsqueda de eventos
+    op.create_index('ix_associations_city_trgm', 'associations', ['city'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_associations_city_trgm', table_name='associations')
+    op.drop_index('ix_associations_name_id', table_name='associations')
+    op.drop_index('ix_associations_association_type', table_name='associations')
+
+    with op.batch_alter_table('associations', schema=None) as batch_op:
+        batch_op.drop_column('city')
+        batch_op.drop_column('association_type')
@@ -0,0 +1,81 @@
+"""add full-text search indexes for events
+
+Revision ID: 3d7a9c5e1f20
+Revises: 8c1f4e2a9b73
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7a9c5e1f20'
+down_revision = '8c1f4e2a9b73'
+branch_labels = None
+depends_on = None
+
+
+# Debe coincidir con EVENT_SEARCH_DOCUMENT_SQL en api/services/event_search_service.py
+EVENT_SEARCH_DOCUMENT_SQL = (
+    "to_tsvector('spanish'::regconfig, "
+    "coalesce(events.title, '') || ' ' || coalesce(events.description, '') || ' ' || "
+    "coalesce(events.city, '') || ' ' || coalesce(events.event_type, ''))"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Búsqueda por relevancia sobre título, descripción, ciudad y tipo
+        op.execute(
+            "CREATE INDEX ix_events_search_document ON events USING gin ("
+            + EVENT_SEARCH_DOCUMENT_SQL.replace('events.', '') + ")"
+        )
+        # Trigramas para que el filtro city ILIKE '%x%' pueda usar índice
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_index('ix_events_city_trgm', 'events', ['city'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'})
+
+    if dialect == 'sqlite':
+        # Tabla FTS5 sincronizada con events mediante triggers (entorno local)
+        op.execute(
+            "CREATE VIRTUAL TABLE events_fts USING fts5("
+            "title, description, city, event_type, "
+            "content='events', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER events_fts_after_insert AFTER INSERT ON events BEGIN "
+            "INSERT INTO events_fts(rowid, title, description, city, event_type) "
+            "VALUES (new.id, new.title, new.description, new.city, new.event_type); END"
+        )
+        op.execute(
+            "CREATE TRIGGER events_fts_after_delete AFTER DELETE ON events BEGIN "
+            "INSERT INTO events_fts(events_fts, rowid, title, description, city, event_type) "
+            "VALUES ('delete', old.id, old.title, old.description, old.city, old.event_type); END"
+        )
+        op.execute(
+            "CREATE TRIGGER events_fts_after_update AFTER UPDATE ON events BEGIN "
+            "INSERT INTO events_fts(events_fts, rowid, title, description, city, event_type) "
+            "VALUES ('delete', old.id, old.title, old.description, old.city, old.event_type); "
+            "INSERT INTO events_fts(rowid, title, description, city, event_type) "
+            "VALUES (new.id, new.title, new.description, new.city, new.event_type); END"
+        )
+        op.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS events_fts_after_update")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_after_delete")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_after_insert")
+        op.execute("DROP TABLE IF EXISTS events_fts")
+
+    op.drop_index('ix_events_city_trgm', table_name='events')
+
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_events_search_document")
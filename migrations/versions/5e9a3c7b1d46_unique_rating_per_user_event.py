@@ -0,0 +1,44 @@
+"""make ratings (user_id, event_id) unique
+
+Revision ID: 5e9a3c7b1d46
+Revises: 0b7e4d2c9a31
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9a3c7b1d46'
+down_revision = '0b7e4d2c9a31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Quitar valoraciones duplicadas (se conserva la primera de cada usuario y evento)
+    op.execute(
+        "DELETE FROM ratings WHERE EXISTS ("
+        "SELECT 1 FROM ratings AS first_rating "
+        "WHERE first_rating.user_id = ratings.user_id "
+        "AND first_rating.event_id = ratings.event_id "
+        "AND first_rating.id < ratings.id)"
+    )
+
+    # Recalcular los contadores de las asociaciones tras el borrado
+    op.execute(
+        "UPDATE associations SET "
+        "rating_sum = (SELECT coalesce(sum(rating), 0) FROM ratings WHERE ratings.association_id = associations.id), "
+        "rating_count = (SELECT count(*) FROM ratings WHERE ratings.association_id = associations.id)"
+    )
+
+    with op.batch_alter_table('ratings', schema=None) as batch_op:
+        batch_op.drop_index('ix_ratings_user_event')
+        batch_op.create_index('ix_ratings_user_event', ['user_id', 'event_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('ratings', schema=None) as batch_op:
+        batch_op.drop_index('ix_ratings_user_event')
+        batch_op.create_index('ix_ratings_user_event', ['user_id', 'event_id'], unique=False)
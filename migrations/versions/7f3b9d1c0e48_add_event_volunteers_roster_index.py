@@ -0,0 +1,26 @@
+"""add roster pagination index on event_volunteers
+
+Revision ID: 7f3b9d1c0e48
+Revises: e4a6b18f2d95
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3b9d1c0e48'
+down_revision = 'e4a6b18f2d95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('event_volunteers', schema=None) as batch_op:
+        batch_op.create_index('ix_event_volunteers_event_joined', ['event_id', 'joined_at', 'volunteer_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('event_volunteers', schema=None) as batch_op:
+        batch_op.drop_index('ix_event_volunteers_event_joined')
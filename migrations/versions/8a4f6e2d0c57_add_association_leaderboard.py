@@ -0,0 +1,38 @@
+"""add association_leaderboard table
+
+Revision ID: 8a4f6e2d0c57
+Revises: 5e9a3c7b1d46
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4f6e2d0c57'
+down_revision = '5e9a3c7b1d46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('association_leaderboard',
+    sa.Column('association_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('average_rating', sa.Float(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['association_id'], ['associations.id'], ),
+    sa.PrimaryKeyConstraint('association_id')
+    )
+    with op.batch_alter_table('association_leaderboard', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_association_leaderboard_rank'), ['rank'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('association_leaderboard', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_association_leaderboard_rank'))
+
+    op.drop_table('association_leaderboard')
@@ -0,0 +1,68 @@
+"""add indexes for hot query predicates
+
+Revision ID: 8c1f4e2a9b73
+Revises: 35705a331679
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1f4e2a9b73'
+down_revision = '35705a331679'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.create_index('ix_events_active_association_date', ['is_active', 'association_id', 'date'], unique=False)
+        batch_op.create_index('ix_events_active_date_id', ['date', 'id'], unique=False,
+                              postgresql_where=sa.text('is_active = true'),
+                              sqlite_where=sa.text('is_active = 1'))
+        batch_op.create_index('ix_events_event_type', ['event_type'], unique=False)
+
+    with op.batch_alter_table('donations', schema=None) as batch_op:
+        batch_op.create_index('ix_donations_donor_created', ['donor_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_donations_association_created', ['association_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_donations_event_created', ['event_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_donations_completed_association_created', ['association_id', 'created_at'], unique=False,
+                              postgresql_where=sa.text("status = 'COMPLETED'"),
+                              sqlite_where=sa.text("status = 'COMPLETED'"))
+        batch_op.create_index('ix_donations_stripe_session_id', ['stripe_session_id'], unique=False)
+
+    with op.batch_alter_table('ratings', schema=None) as batch_op:
+        batch_op.create_index('ix_ratings_user_event', ['user_id', 'event_id'], unique=False)
+        batch_op.create_index('ix_ratings_association_created', ['association_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('event_volunteers', schema=None) as batch_op:
+        batch_op.create_index('ix_event_volunteers_volunteer_id', ['volunteer_id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    with op.batch_alter_table('event_volunteers', schema=None) as batch_op:
+        batch_op.drop_index('ix_event_volunteers_volunteer_id')
+
+    with op.batch_alter_table('ratings', schema=None) as batch_op:
+        batch_op.drop_index('ix_ratings_association_created')
+        batch_op.drop_index('ix_ratings_user_event')
+
+    with op.batch_alter_table('donations', schema=None) as batch_op:
+        batch_op.drop_index('ix_donations_stripe_session_id')
+        batch_op.drop_index('ix_donations_completed_association_created')
+        batch_op.drop_index('ix_donations_event_created')
+        batch_op.drop_index('ix_donations_association_created')
+        batch_op.drop_index('ix_donations_donor_created')
+
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_index('ix_events_event_type')
+        batch_op.drop_index('ix_events_active_date_id')
+        batch_op.drop_index('ix_events_active_association_date')
@@ -0,0 +1,137 @@
+"""move inline association images to the asset store
+
+Revision ID: 9d1b5f7c3e28
+Revises: 2c6d8e0f4a19
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import uuid
+
+from alembic import op, context
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d1b5f7c3e28'
+down_revision = '2c6d8e0f4a19'
+branch_labels = None
+depends_on = None
+
+associations = sa.table('associations', sa.column('id', sa.Integer), sa.column('image_url', sa.String))
+
+# Copia fija de la configuración del almacén en esta revisión (api/assets.py y app.py):
+# la migración no importa código de la aplicación para no cambiar si este cambia
+ASSET_STORE_DIR = os.getenv('ASSET_STORE_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'instance', 'assets')
+ASSET_BASE_URL = os.getenv('ASSET_BASE_URL', os.getenv('VITE_BACKEND_URL', '')).rstrip('/')
+ASSET_URL_PREFIX = '/api/assets/'
+INLINE_IMAGE_PATTERN = re.compile(r'^data:image/[\w.+-]+;base64,', re.IGNORECASE)
+ASSET_URL_PATTERN = re.compile(r'/api/assets/(?P<digest>[0-9a-f]{64})\.(?P<ext>png|jpg|gif|webp)$')
+ASSET_MIMETYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'gif': 'image/gif', 'webp': 'image/webp'}
+
+# Ámbitos de caché que incluyen la imagen de la asociación
+CACHE_SCOPES = ('associations', 'events', 'leaderboard', 'ratings')
+
+# Ancho de la columna image_url: al volver atrás no se reinsertan imágenes que no quepan
+IMAGE_URL_MAX_LENGTH = 20000
+
+
+def _image_extension(data):
+    """Extensión según la firma del fichero (los mismos formatos que admite el almacén)"""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if data.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def _asset_path(filename):
+    return os.path.join(ASSET_STORE_DIR, filename[:2], filename)
+
+
+def _externalize(association_id, image_url):
+    """Guardar el original en el almacén y devolver su URL. La miniatura la genera
+    la aplicación la primera vez que se pide"""
+    data = None
+    if INLINE_IMAGE_PATTERN.match(image_url):
+        try:
+            data = base64.b64decode(image_url.split(',', 1)[1], validate=True)
+        except (binascii.Error, ValueError):
+            pass
+    extension = _image_extension(data) if data else None
+    if extension is None:
+        # Se deja la fila como estaba: no perder datos por una imagen corrupta
+        print(f"⚠️ Imagen de la asociación {association_id} no válida, se mantiene en línea")
+        return None
+
+    filename = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+    path = _asset_path(filename)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return f"{ASSET_BASE_URL}{ASSET_URL_PREFIX}{filename}"
+
+
+def _inline(association_id, image_url):
+    match = ASSET_URL_PATTERN.search(image_url or '')
+    if not match:
+        return None
+    path = _asset_path(f"{match['digest']}.{match['ext']}")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        data_uri = f"data:{ASSET_MIMETYPES[match['ext']]};base64,{base64.b64encode(f.read()).decode()}"
+    return data_uri if len(data_uri) <= IMAGE_URL_MAX_LENGTH else None
+
+
+def _bump_cache_versions():
+    # Las respuestas cacheadas llevan la imagen antigua
+    for scope in CACHE_SCOPES:
+        op.execute(f"UPDATE cache_versions SET version = version + 1 WHERE scope = '{scope}'")
+        op.execute(
+            f"INSERT INTO cache_versions (scope, version) SELECT '{scope}', 1 "
+            f"WHERE NOT EXISTS (SELECT 1 FROM cache_versions WHERE scope = '{scope}')"
+        )
+
+
+def _rewrite_images(condition, convert):
+    """Convertir fila a fila (solo se cargan los ids de golpe) las imágenes que cumplan `condition`"""
+    bind = op.get_bind()
+    ids = bind.execute(sa.select(associations.c.id).where(condition)).scalars().all()
+    for association_id in ids:
+        image_url = bind.execute(
+            sa.select(associations.c.image_url).where(associations.c.id == association_id)
+        ).scalar_one()
+        new_image_url = convert(association_id, image_url)
+        if new_image_url and new_image_url != image_url:
+            bind.execute(
+                associations.update().where(associations.c.id == association_id).values(image_url=new_image_url)
+            )
+
+    if ids:
+        _bump_cache_versions()
+
+
+def upgrade():
+    # Migración de datos: necesita leer las filas, no se puede generar en modo --sql
+    if context.is_offline_mode():
+        return
+    _rewrite_images(associations.c.image_url.like('data:%'), _externalize)
+
+
+def downgrade():
+    if context.is_offline_mode():
+        return
+    _rewrite_images(associations.c.image_url.like(f'%{ASSET_URL_PREFIX}%'), _inline)
@@ -0,0 +1,44 @@
+"""add stripe_webhook_events inbox table
+
+Revision ID: a1e5c7d3f862
+Revises: c9d2e6a41b07
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1e5c7d3f862'
+down_revision = 'c9d2e6a41b07'
+branch_labels = None
+depends_on = None
+
+webhook_event_status = sa.Enum('PENDING', 'PROCESSED', 'FAILED', name='webhookeventstatus')
+
+
+def upgrade():
+    op.create_table('stripe_webhook_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stripe_event_id', sa.String(length=255), nullable=False),
+    sa.Column('event_type', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', webhook_event_status, nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stripe_event_id')
+    )
+    with op.batch_alter_table('stripe_webhook_events', schema=None) as batch_op:
+        batch_op.create_index('ix_stripe_webhook_events_status_id', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stripe_webhook_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_stripe_webhook_events_status_id')
+
+    op.drop_table('stripe_webhook_events')
+    webhook_event_status.drop(op.get_bind(), checkfirst=True)
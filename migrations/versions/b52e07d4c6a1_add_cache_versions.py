@@ -0,0 +1,33 @@
+"""add cache_versions table for response ETags
+
+Revision ID: b52e07d4c6a1
+Revises: 3d7a9c5e1f20
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52e07d4c6a1'
+down_revision = '3d7a9c5e1f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_versions = op.create_table('cache_versions',
+    sa.Column('scope', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+    op.bulk_insert(cache_versions, [
+        {'scope': 'events', 'version': 0},
+        {'scope': 'associations', 'version': 0},
+        {'scope': 'ratings', 'version': 0},
+    ])
+
+
+def downgrade():
+    op.drop_table('cache_versions')
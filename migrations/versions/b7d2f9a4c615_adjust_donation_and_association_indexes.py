@@ -0,0 +1,30 @@
+"""drop duplicated partial donations index and index associations.user_id
+
+Revision ID: b7d2f9a4c615
+Revises: 9d1b5f7c3e28
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f9a4c615'
+down_revision = '9d1b5f7c3e28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Las estadísticas usan ix_donations_association_created, que además sirve a los listados
+    op.drop_index('ix_donations_completed_association_created', table_name='donations')
+    # Join asociación -> usuario (login, donante de la última donación, exportación fiscal)
+    op.create_index('ix_associations_user_id', 'associations', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_associations_user_id', table_name='associations')
+    op.create_index('ix_donations_completed_association_created', 'donations', ['association_id', 'created_at'], unique=False,
+                    postgresql_where=sa.text("status = 'COMPLETED'"),
+                    sqlite_where=sa.text("status = 'COMPLETED'"))
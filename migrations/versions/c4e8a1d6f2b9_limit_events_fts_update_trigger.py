@@ -0,0 +1,46 @@
+"""only reindex events_fts when a searchable column changes
+
+Revision ID: c4e8a1d6f2b9
+Revises: b7d2f9a4c615
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1d6f2b9'
+down_revision = 'b7d2f9a4c615'
+branch_labels = None
+depends_on = None
+
+
+FTS_UPDATE_BODY = (
+    "BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, title, description, city, event_type) "
+    "VALUES ('delete', old.id, old.title, old.description, old.city, old.event_type); "
+    "INSERT INTO events_fts(rowid, title, description, city, event_type) "
+    "VALUES (new.id, new.title, new.description, new.city, new.event_type); END"
+)
+
+
+def upgrade():
+    # Solo SQLite tiene la tabla FTS5 (en PostgreSQL el índice GIN es de expresión)
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    # Los cambios de volunteers_count (cada join/leave) ya no reescriben el índice de texto
+    op.execute("DROP TRIGGER IF EXISTS events_fts_after_update")
+    op.execute(
+        "CREATE TRIGGER events_fts_after_update "
+        "AFTER UPDATE OF title, description, city, event_type ON events " + FTS_UPDATE_BODY
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS events_fts_after_update")
+    op.execute("CREATE TRIGGER events_fts_after_update AFTER UPDATE ON events " + FTS_UPDATE_BODY)
@@ -0,0 +1,43 @@
+"""add donation_daily_rollups table
+
+Revision ID: c9d2e6a41b07
+Revises: 7f3b9d1c0e48
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9d2e6a41b07'
+down_revision = '7f3b9d1c0e48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('donation_daily_rollups',
+    sa.Column('association_id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('donation_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['association_id'], ['associations.id'], ),
+    sa.PrimaryKeyConstraint('association_id', 'event_id', 'day', 'currency')
+    )
+
+    # Carga inicial con las donaciones ya completadas
+    op.execute(
+        "INSERT INTO donation_daily_rollups "
+        "(association_id, event_id, day, currency, total_amount, donation_count) "
+        "SELECT association_id, coalesce(event_id, 0), date(coalesce(completed_at, created_at)), "
+        "currency, sum(amount), count(id) "
+        "FROM donations WHERE status = 'COMPLETED' "
+        "GROUP BY association_id, coalesce(event_id, 0), date(coalesce(completed_at, created_at)), currency"
+    )
+
+
+def downgrade():
+    op.drop_table('donation_daily_rollups')
@@ -0,0 +1,26 @@
+"""add event_id index to donation_daily_rollups
+
+Revision ID: d3b8f1a6c254
+Revises: a1e5c7d3f862
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3b8f1a6c254'
+down_revision = 'a1e5c7d3f862'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('donation_daily_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_donation_daily_rollups_event_id', ['event_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('donation_daily_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_donation_daily_rollups_event_id')
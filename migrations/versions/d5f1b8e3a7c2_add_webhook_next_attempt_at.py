@@ -0,0 +1,26 @@
+"""schedule stripe webhook retries with next_attempt_at
+
+Revision ID: d5f1b8e3a7c2
+Revises: c4e8a1d6f2b9
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f1b8e3a7c2'
+down_revision = 'c4e8a1d6f2b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL = listo para procesar (los pendientes actuales se procesan en la siguiente pasada)
+    op.add_column('stripe_webhook_events', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('stripe_webhook_events', schema=None) as batch_op:
+        batch_op.drop_column('next_attempt_at')
@@ -0,0 +1,34 @@
+"""add denormalized volunteers_count to events
+
+Revision ID: e4a6b18f2d95
+Revises: b52e07d4c6a1
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a6b18f2d95'
+down_revision = 'b52e07d4c6a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('events', sa.Column('volunteers_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Rellenar el recuento con las inscripciones existentes
+    op.execute(
+        "UPDATE events SET volunteers_count = ("
+        "SELECT count(*) FROM event_volunteers WHERE event_volunteers.event_id = events.id)"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        # DROP COLUMN nativo: el modo batch recrearía la tabla y perdería los triggers FTS5
+        op.execute("ALTER TABLE events DROP COLUMN volunteers_count")
+    else:
+        op.drop_column('events', 'volunteers_count')
@@ -0,0 +1,190 @@
+"""
+Almacén de imágenes direccionado por contenido.
+
+Las imágenes que llegan en línea como data URI (data:image/...;base64,...) se
+decodifican, se validan con Pillow y se guardan en disco con el sha256 de su
+contenido como nombre, junto con una miniatura que se genera una sola vez.
+En la base de datos solo queda la URL pública del fichero.
+
+- Estructura: <ASSET_STORE_DIR>/<2 primeros hex>/<sha256>.<ext> y
+  <sha256>_<THUMBNAIL_SIZE>.<ext> para la miniatura.
+- Los ficheros nunca cambian (el nombre es su hash): se sirven con
+  Cache-Control immutable y un año de max-age.
+- La URL se construye con ASSET_BASE_URL; si está vacío queda relativa (/api/assets/...).
+"""
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import uuid
+
+from flask import current_app
+from PIL import Image, ImageOps
+
+ASSET_URL_PREFIX = "/api/assets/"
+# Lado máximo de la miniatura en píxeles
+THUMBNAIL_SIZE = 256
+DEFAULT_ASSET_MAX_BYTES = 2 * 1024 * 1024
+# Tope de píxeles (ancho x alto) que se aceptan antes de decodificar la imagen
+DEFAULT_ASSET_MAX_PIXELS = 4096 * 4096
+
+# Formatos de Pillow admitidos y su extensión (SVG no: podría llevar scripts)
+ASSET_FORMATS = {"PNG": "png", "JPEG": "jpg", "GIF": "gif", "WEBP": "webp"}
+ASSET_MIMETYPES = {"png": "image/png", "jpg": "image/jpeg", "gif": "image/gif", "webp": "image/webp"}
+_FORMATS_BY_EXTENSION = {ext: fmt for fmt, ext in ASSET_FORMATS.items()}
+
+INLINE_IMAGE_PATTERN = re.compile(r"^data:image/[\w.+-]+;base64,", re.IGNORECASE)
+ASSET_FILENAME_PATTERN = re.compile(r"^(?P<digest>[0-9a-f]{64})(?:_(?P<size>\d+))?\.(?P<ext>png|jpg|gif|webp)$")
+_ASSET_URL_PATTERN = re.compile(r"/api/assets/(?P<digest>[0-9a-f]{64})\.(?P<ext>png|jpg|gif|webp)$")
+
+
+def is_inline_image(value):
+    return bool(value) and INLINE_IMAGE_PATTERN.match(value) is not None
+
+
+def _store_dir():
+    return current_app.config.get("ASSET_STORE_DIR") or os.path.join(current_app.instance_path, "assets")
+
+
+def _asset_path(filename):
+    return os.path.join(_store_dir(), filename[:2], filename)
+
+
+def _write_once(path, data):
+    """Escribir el fichero de forma atómica; si ya existe no se toca (mismo hash, mismo contenido)"""
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _check_dimensions(image):
+    """Rechazar por las dimensiones de la cabecera, antes de decodificar los píxeles"""
+    max_pixels = current_app.config.get("ASSET_MAX_PIXELS", DEFAULT_ASSET_MAX_PIXELS)
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ValueError(f"La imagen no puede superar {max_pixels} píxeles")
+
+
+def _make_thumbnail(data, image_format):
+    """Miniatura en el mismo formato que el original. Lanza ValueError si no se puede decodificar."""
+    try:
+        image = Image.open(io.BytesIO(data))
+        _check_dimensions(image)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        # Modos que el formato de destino no sabe guardar (p. ej. P o LA en JPEG)
+        if image_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+            image = image.convert("RGB")
+        elif image_format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format)
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+        raise ValueError("La imagen no es válida")
+    return buffer.getvalue()
+
+
+def store_image(data):
+    """Guardar una imagen y su miniatura. Devuelve el nombre del fichero original.
+    Lanza ValueError si no es una imagen admitida."""
+    max_bytes = current_app.config.get("ASSET_MAX_BYTES", DEFAULT_ASSET_MAX_BYTES)
+    if len(data) > max_bytes:
+        raise ValueError(f"La imagen no puede superar {max_bytes // 1024} KB")
+
+    try:
+        image = Image.open(io.BytesIO(data))
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+        raise ValueError("La imagen no es válida")
+    _check_dimensions(image)
+    try:
+        image.verify()
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+        raise ValueError("La imagen no es válida")
+
+    extension = ASSET_FORMATS.get(image.format)
+    if extension is None:
+        raise ValueError("Formato de imagen no admitido (PNG, JPEG, GIF o WEBP)")
+
+    # La miniatura se genera antes de escribir nada: si no se puede decodificar
+    # la imagen no llega al almacén
+    thumbnail = _make_thumbnail(data, image.format)
+    digest = hashlib.sha256(data).hexdigest()
+    filename = f"{digest}.{extension}"
+    _write_once(_asset_path(filename), data)
+    _write_once(_asset_path(f"{digest}_{THUMBNAIL_SIZE}.{extension}"), thumbnail)
+    return filename
+
+
+def asset_url(filename):
+    base_url = (current_app.config.get("ASSET_BASE_URL") or "").rstrip("/")
+    return f"{base_url}{ASSET_URL_PREFIX}{filename}"
+
+
+def externalize_inline_image(value):
+    """Si `value` es un data URI, guardarlo en el almacén y devolver su URL.
+    Cualquier otro valor se devuelve sin cambios. Lanza ValueError si no es válido."""
+    if not is_inline_image(value):
+        return value
+
+    payload = value.split(",", 1)[1]
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("La imagen en base64 no es válida")
+    return asset_url(store_image(data))
+
+
+def inline_asset(url):
+    """Operación inversa: data URI de un fichero del almacén, o None si no lo es o no existe"""
+    match = _ASSET_URL_PATTERN.search(url or "")
+    if not match:
+        return None
+    path = _asset_path(f"{match['digest']}.{match['ext']}")
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        payload = base64.b64encode(f.read()).decode()
+    return f"data:{ASSET_MIMETYPES[match['ext']]};base64,{payload}"
+
+
+def thumbnail_url(image_url):
+    """URL de la miniatura si la imagen está en el almacén; si no, la propia URL"""
+    match = _ASSET_URL_PATTERN.search(image_url or "")
+    if not match:
+        return image_url
+    return f"{image_url[:match.start()]}{ASSET_URL_PREFIX}{match['digest']}_{THUMBNAIL_SIZE}.{match['ext']}"
+
+
+def get_asset_path(filename):
+    """Ruta en disco de un fichero del almacén o None si no existe.
+    Si falta la miniatura pero existe el original, se genera en ese momento; si el
+    original no se puede decodificar se devuelve el original en su lugar."""
+    match = ASSET_FILENAME_PATTERN.match(filename)
+    if not match:
+        return None
+
+    path = _asset_path(filename)
+    if os.path.exists(path):
+        return path
+
+    if match["size"] is None or int(match["size"]) != THUMBNAIL_SIZE:
+        return None
+
+    original_path = _asset_path(f"{match['digest']}.{match['ext']}")
+    if not os.path.exists(original_path):
+        return None
+    with open(original_path, "rb") as f:
+        data = f.read()
+    try:
+        thumbnail = _make_thumbnail(data, _FORMATS_BY_EXTENSION[match["ext"]])
+    except ValueError:
+        current_app.logger.warning("No se pudo generar la miniatura de %s", filename)
+        return original_path
+    _write_once(path, thumbnail)
+    return path
@@ -0,0 +1,188 @@
+"""
+Caché de respuestas para los endpoints públicos de lectura.
+
+Cada endpoint cacheado depende de uno o varios ámbitos ("events",
+"associations", "ratings", "donations", "leaderboard"). Cada ámbito tiene un contador en la tabla
+cache_versions que se incrementa automáticamente cuando se confirma una
+transacción que haya escrito algún modelo que lo afecte. El incremento se hace
+después del commit en una transacción propia y corta: así las escrituras no
+se bloquean entre sí en esas pocas filas compartidas. La ETag de una respuesta
+se calcula a partir de la URL y de esos contadores, así que:
+
+- Si el cliente envía If-None-Match con la ETag vigente se responde 304.
+- Si no, el cuerpo serializado se busca en un LRU en memoria del proceso.
+- Solo si tampoco está se ejecuta la vista y se guarda el resultado.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request, make_response
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .models import db, Event, EventVolunteer, Association, Rating, User, CacheVersion, DonationDailyRollup, AssociationLeaderboard
+
+# Ámbitos de caché afectados al escribir cada modelo
+MODEL_CACHE_SCOPES = {
+    Event: ("events", "ratings"),
+    EventVolunteer: ("events",),
+    Association: ("events", "associations", "ratings", "leaderboard"),
+    # Las valoraciones actualizan los contadores de la asociación
+    Rating: ("ratings", "associations"),
+    User: ("ratings",),
+    DonationDailyRollup: ("donations",),
+    AssociationLeaderboard: ("leaderboard",),
+}
+
+DEFAULT_RESPONSE_CACHE_SIZE = 256
+
+
+class ResponseLRU:
+    """LRU sencillo y seguro entre hilos para cuerpos de respuesta serializados"""
+
+    def __init__(self, maxsize=DEFAULT_RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_lru = ResponseLRU()
+
+
+def _scopes_for_session(session):
+    scopes = set()
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        scopes.update(MODEL_CACHE_SCOPES.get(type(instance), ()))
+    return scopes
+
+
+# Claves de session.info con los ámbitos a invalidar: pendientes del commit y ya confirmados
+PENDING_SCOPES_KEY = "pending_cache_scopes"
+COMMITTED_SCOPES_KEY = "committed_cache_scopes"
+
+
+def bump_cache_versions(connection, scopes):
+    """Incrementar los contadores de los ámbitos indicados (upsert: crea el ámbito si no existe)"""
+    table = CacheVersion.__table__
+    dialect = connection.dialect.name
+    for scope in sorted(scopes):
+        if dialect in ('postgresql', 'sqlite'):
+            dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            stmt = dialect_insert(table).values(scope=scope, version=1)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=['scope'], set_={'version': table.c.version + 1}
+            ))
+            continue
+
+        result = connection.execute(
+            update(table).where(table.c.scope == scope).values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(scope=scope, version=1))
+
+
+def schedule_cache_bump(session, scopes):
+    """Apuntar ámbitos para invalidar cuando la transacción actual haga commit.
+    Para las escrituras de Core (insert/update en bloque) que no pasan por el flush del ORM."""
+    session.info.setdefault(PENDING_SCOPES_KEY, set()).update(scopes)
+
+
+def _collect_scopes_before_flush(session, flush_context, instances):
+    scopes = _scopes_for_session(session)
+    if scopes:
+        schedule_cache_bump(session, scopes)
+
+
+def _mark_scopes_committed(session):
+    # El commit de un savepoint también dispara el evento: esperar al de la transacción externa
+    if session.in_nested_transaction():
+        return
+    scopes = session.info.pop(PENDING_SCOPES_KEY, None)
+    if scopes:
+        session.info[COMMITTED_SCOPES_KEY] = scopes
+
+
+def _bump_versions_after_transaction(session, transaction):
+    # Solo al cerrar la transacción externa (los savepoints tienen parent). Aquí la
+    # sesión ya ha devuelto su conexión al pool: el incremento no ocupa una segunda
+    if transaction.parent is not None:
+        return
+    scopes = session.info.pop(COMMITTED_SCOPES_KEY, None)
+    # Lo que quede pendiente es de una transacción sin commit: se descarta
+    session.info.pop(PENDING_SCOPES_KEY, None)
+    if scopes:
+        with session.get_bind().begin() as connection:
+            bump_cache_versions(connection, scopes)
+
+
+def get_cache_versions(scopes):
+    """Leer los contadores actuales de los ámbitos indicados (una sola consulta)"""
+    rows = db.session.execute(
+        select(CacheVersion.scope, CacheVersion.version).where(CacheVersion.scope.in_(scopes))
+    ).all()
+    versions = dict(rows)
+    return tuple(versions.get(scope, 0) for scope in scopes)
+
+
+def cached_response(*scopes):
+    """Decorador para vistas GET públicas cuya respuesta solo depende de la URL"""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = get_cache_versions(scopes)
+            cache_key = (request.full_path, versions)
+            etag = hashlib.sha1(repr(cache_key).encode()).hexdigest()
+
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                cached = response_lru.get(cache_key)
+                if cached is not None:
+                    response = Response(cached, status=200, mimetype="application/json")
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    # Los errores no se cachean ni llevan ETag
+                    if response.status_code != 200:
+                        return response
+                    response_lru.set(cache_key, response.get_data())
+
+            response.set_etag(etag)
+            # El navegador puede guardar la respuesta pero debe revalidarla siempre
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def setup_response_cache(app):
+    response_lru.maxsize = app.config.get("RESPONSE_CACHE_SIZE", DEFAULT_RESPONSE_CACHE_SIZE)
+    for name, listener in (
+        ("before_flush", _collect_scopes_before_flush),
+        ("after_commit", _mark_scopes_committed),
+        ("after_transaction_end", _bump_versions_after_transaction),
+    ):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
@@ -1,5 +1,14 @@
+import json
+import time
 import click
-from api.models import db, User
+from sqlalchemy import func, select, update
+from api.models import db, User, Event, EventVolunteer, Association, Rating
+from api.cache import schedule_cache_bump
+from api.services.event_import_service import EventImportService, IMPORT_CHUNK_SIZE
+from api.services.donation_rollup_service import DonationRollupService
+from api.services.stripe_webhook_service import StripeWebhookService, WEBHOOK_BATCH_SIZE
+from api.services.donor_tax_export_service import DonorTaxExportService, TAX_EXPORT_FORMATS
+from api.services.leaderboard_service import LeaderboardService
 
 """
 In this file, you can add as many commands as you want using the @app.cli.command decorator
@@ -30,4 +39,140 @@ def setup_commands(app):
 
     @app.cli.command("insert-test-data")
     def insert_test_data():
-        pass
\ No newline at end of file
+        pass
+
+    """
+    Recalcula Event.volunteers_count a partir de la tabla event_volunteers
+    y corrige los eventos desincronizados: $ flask reconcile-volunteer-counts
+    """
+    @app.cli.command("reconcile-volunteer-counts")
+    def reconcile_volunteer_counts():
+        real_count = (
+            select(func.count(EventVolunteer.volunteer_id))
+            .where(EventVolunteer.event_id == Event.id)
+            .scalar_subquery()
+        )
+        result = db.session.execute(
+            update(Event)
+            .where(Event.volunteers_count != real_count)
+            .values(volunteers_count=real_count)
+            .execution_options(synchronize_session=False)
+        )
+        # El update de Core no pasa por el flush del ORM: invalidar los listados de eventos
+        schedule_cache_bump(db.session, ("events",))
+        db.session.commit()
+        print("Eventos corregidos:", result.rowcount)
+
+    """
+    Recalcula Association.rating_sum y rating_count a partir de la tabla ratings
+    y corrige las asociaciones desincronizadas: $ flask reconcile-rating-aggregates
+    """
+    @app.cli.command("reconcile-rating-aggregates")
+    def reconcile_rating_aggregates():
+        real_sum = (
+            select(func.coalesce(func.sum(Rating.rating), 0))
+            .where(Rating.association_id == Association.id)
+            .scalar_subquery()
+        )
+        real_count = (
+            select(func.count(Rating.id))
+            .where(Rating.association_id == Association.id)
+            .scalar_subquery()
+        )
+        result = db.session.execute(
+            update(Association)
+            .where((Association.rating_sum != real_sum) | (Association.rating_count != real_count))
+            .values(rating_sum=real_sum, rating_count=real_count)
+            .execution_options(synchronize_session=False)
+        )
+        # El update de Core no pasa por el flush del ORM: invalidar las respuestas con promedios
+        schedule_cache_bump(db.session, ("associations", "ratings"))
+        db.session.commit()
+        print("Asociaciones corregidas:", result.rowcount)
+
+    """
+    Importa eventos en bloque desde un archivo CSV o JSON para una asociación:
+    $ flask import-events 3 eventos.csv
+    """
+    @app.cli.command("import-events")
+    @click.argument("association_id", type=int)
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--chunk-size", default=IMPORT_CHUNK_SIZE, help="Filas por transacción")
+    def import_events(association_id, path, chunk_size):
+        if not db.session.get(Association, association_id):
+            raise click.ClickException(f"Asociación con id {association_id} no encontrada")
+
+        with open(path, encoding="utf-8-sig") as f:
+            content = f.read()
+
+        if path.lower().endswith(".json"):
+            rows = json.loads(content)
+            if isinstance(rows, dict):
+                rows = rows.get("events", [])
+        else:
+            rows = EventImportService.parse_csv(content)
+
+        result = EventImportService.import_events(rows, association_id, chunk_size=chunk_size)
+        print("Eventos creados:", result["created"])
+        for error in result["errors"]:
+            print("Fila", error["row"], "->", error["details"])
+
+    """
+    Reconstruye la tabla donation_daily_rollups desde las donaciones completadas:
+    $ flask rebuild-donation-rollups
+    """
+    @app.cli.command("rebuild-donation-rollups")
+    def rebuild_donation_rollups():
+        rows = DonationRollupService.rebuild()
+        print("Filas diarias generadas:", rows)
+
+    """
+    Procesa los webhooks de Stripe pendientes en la bandeja de entrada. Los
+    que fallan se reintentan con espera exponencial (next_attempt_at).
+    Con --loop se queda consultándola (proceso worker de render.yaml/Procfile):
+    $ flask process-stripe-webhooks --loop
+    """
+    @app.cli.command("process-stripe-webhooks")
+    @click.option("--batch-size", default=WEBHOOK_BATCH_SIZE, help="Eventos por transacción")
+    @click.option("--loop", is_flag=True, help="Seguir procesando indefinidamente")
+    @click.option("--interval", default=5.0, help="Segundos de espera cuando no hay eventos listos para procesar")
+    def process_stripe_webhooks(batch_size, loop, interval):
+        while True:
+            result = StripeWebhookService.process_pending(batch_size=batch_size)
+            if any(result.values()):
+                print("Procesados:", result["processed"], "Reintentos:", result["retry"], "Fallidos:", result["failed"])
+            if not loop:
+                break
+            # Lote completo: puede haber más eventos listos, seguir sin esperar
+            if sum(result.values()) < batch_size:
+                time.sleep(interval)
+
+    """
+    Exporta el resumen anual por donante de una asociación para el Modelo 182:
+    $ flask export-donor-tax 3 2025 --format fixed --output modelo182.txt
+    """
+    @app.cli.command("export-donor-tax")
+    @click.argument("association_id", type=int)
+    @click.argument("fiscal_year", type=int)
+    @click.option("--format", "export_format", type=click.Choice(TAX_EXPORT_FORMATS), default="csv")
+    @click.option("--output", type=click.File("w", encoding="utf-8"), default="-", help="Archivo de salida (por defecto stdout)")
+    def export_donor_tax(association_id, fiscal_year, export_format, output):
+        try:
+            lines = DonorTaxExportService.iter_export(association_id, fiscal_year, export_format)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        for line in lines:
+            output.write(line)
+
+    """
+    Recalcula el ranking bayesiano de asociaciones (pensado para ejecutarse
+    periódicamente con cron): $ flask refresh-leaderboard --prior-weight 10
+    """
+    @app.cli.command("refresh-leaderboard")
+    @click.option("--prior-weight", type=float, default=None,
+                  help="Peso de la media global (por defecto, valoraciones medias por asociación)")
+    def refresh_leaderboard(prior_weight):
+        start = time.perf_counter()
+        ranked = LeaderboardService.refresh(prior_weight=prior_weight)
+        print("Asociaciones en el ranking:", ranked, f"({time.perf_counter() - start:.2f} s)")
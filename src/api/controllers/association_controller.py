@@ -1,5 +1,10 @@
 from api.models.association import Association
-from api.services.association_service import AssociationService
+from api.services.association_service import (
+    AssociationService,
+    ASSOCIATION_SORT_FIELDS,
+    DEFAULT_ASSOCIATIONS_PAGE_SIZE,
+    MAX_ASSOCIATIONS_PAGE_SIZE
+)
 
 def get_all_associations():
     try: 
@@ -60,41 +65,63 @@ def get_association_by_id(association_id):
 
 def filter_associations_post(filter_data):
     try:
-        # Obtener todas las asociaciones de la base de datos real
-        associations = AssociationService.get_all_associations()
-        filtered = [association.serialize() for association in associations]
-        
         # Extrae parámetros del filtro
-        filter_types = filter_data.get('types', [])
-        location = filter_data.get('location', '')
-        min_id = filter_data.get('min_id', 0)
+        filter_types = filter_data.get('types') or []
+        if isinstance(filter_types, str):
+            filter_types = [filter_types]
+        location = (filter_data.get('location') or '').strip()
+        sort_field = filter_data.get('sort', 'id')
         
-        # Aplicar filtros si existen
-        if filter_types:
-            # Nota: Necesitaríamos un campo 'type' en el modelo Association
-            pass  # Por ahora no filtramos por tipo
+        if sort_field not in ASSOCIATION_SORT_FIELDS:
+            return {
+                "success": False,
+                "message": "sort debe ser id o name",
+                "associations": []
+            }
         
-        if location:
-            # Filtrar por ubicación si existe en el modelo
-            location_lower = location.lower()
-            # Esto requeriría un campo location en Association
-            pass  # Por ahora no filtramos por ubicación
+        try:
+            min_id = int(filter_data.get('min_id') or 0)
+            limit = int(filter_data.get('limit') or DEFAULT_ASSOCIATIONS_PAGE_SIZE)
+        except (ValueError, TypeError):
+            return {
+                "success": False,
+                "message": "min_id y limit deben ser números enteros",
+                "associations": []
+            }
         
-        if min_id:
-            filtered = [a for a in filtered if a['id'] >= min_id]
+        if limit < 1:
+            return {
+                "success": False,
+                "message": "limit debe ser mayor que 0",
+                "associations": []
+            }
+        
+        # Filtros, orden y paginación se resuelven en la base de datos
+        try:
+            associations, next_cursor = AssociationService.filter_associations(
+                types=filter_types,
+                location=location,
+                min_id=min_id,
+                sort=sort_field,
+                reverse=filter_data.get('reverse', False) in (True, 'true', '1', 1),
+                cursor=filter_data.get('cursor'),
+                limit=min(limit, MAX_ASSOCIATIONS_PAGE_SIZE)
+            )
+        except (ValueError, TypeError):
+            return {
+                "success": False,
+                "message": "Cursor de paginación inválido",
+                "associations": []
+            }
         
-        # Ordenar resultados
-        if 'sort' in filter_data:
-            sort_field = filter_data['sort']
-            reverse = filter_data.get('reverse', False)
-            if sort_field in ['id', 'name']:  # Solo campos que existen
-                filtered.sort(key=lambda x: x.get(sort_field, ''), reverse=reverse)
+        filtered = [association.serialize() for association in associations]
         
         return {
             "success": True,
             "count": len(filtered),
             "filters_applied": filter_data,
-            "associations": filtered
+            "associations": filtered,
+            "next_cursor": next_cursor
         }
     
     except Exception as e:
@@ -4,6 +4,7 @@ import logging
 from ..services.auth_service import AuthService
 from ..services.association_service import AssociationService
 from ..models import db
+from ..assets import externalize_inline_image
 
 class AuthController:
     @staticmethod
@@ -47,6 +48,12 @@ class AuthController:
         if AssociationService.get_association_by_cif(data['cif']):
             return jsonify({'message': 'Este CIF ya está registrado por otra asociación. Verifica que sea correcto o contacta con soporte.'}), HTTPStatus.CONFLICT
         
+        # Guardar antes la imagen en base64 (si la hay) para responder 400 si no es válida
+        try:
+            image_url = externalize_inline_image(data.get('image_url'))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), HTTPStatus.BAD_REQUEST
+
         try:
             # Create user first (without committing to database)
             user = AuthService.create_user(
@@ -68,13 +75,15 @@ class AuthController:
                 description=data['description'],
                 contact_email=data['contact_email'],
                 user_id=user.id,
-                image_url=data.get('image_url'),
+                image_url=image_url,
                 website_url=data.get('website_url'),
                 social_media_url=data.get('social_media_url'),
                 contact_phone=data.get('contact_phone'),
                 facebook_url=data.get('facebook_url'),
                 instagram_url=data.get('instagram_url'),
                 twitter_url=data.get('twitter_url'),
+                association_type=data.get('association_type'),
+                city=data.get('city'),
                 commit=False
             )
             
@@ -97,7 +106,9 @@ class AuthController:
                 'contact_phone': association.contact_phone,
                 'facebook_url': association.facebook_url,
                 'instagram_url': association.instagram_url,
-                'twitter_url': association.twitter_url
+                'twitter_url': association.twitter_url,
+                'association_type': association.association_type,
+                'city': association.city
             }
             
             return jsonify({
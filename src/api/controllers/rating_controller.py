@@ -1,5 +1,5 @@
 from flask_jwt_extended import get_jwt_identity
-from api.services.rating_service import RatingService
+from api.services.rating_service import RatingService, DEFAULT_RATINGS_PAGE_SIZE
 
 
 def check_can_rate(association_id):
@@ -13,16 +13,15 @@ def check_can_rate(association_id):
                 "message": "Usuario no autenticado"
             }, 401
         
-        can_rate = RatingService.can_user_rate_association(current_user_id, association_id)
-        
-        # Obtener eventos no valorados para mostrar información adicional
+        # Una sola consulta: los eventos terminados sin valorar deciden si puede valorar
         unrated_events = RatingService.get_unrated_events_for_user(current_user_id, association_id)
+        can_rate = len(unrated_events) > 0
         
         result = {
             "success": True,
             "can_rate": can_rate,
             "already_rated": not can_rate,  # Si no puede valorar, significa que no hay eventos sin valorar
-            "unrated_events": [event.serialize() for event in unrated_events],
+            "unrated_events": [event.serialize_summary() for event in unrated_events],
             "message": "Verificación completada"
         }
         
@@ -35,16 +34,26 @@ def check_can_rate(association_id):
         }, 500
 
 
-def get_association_ratings(association_id):
-    """Obtener todas las valoraciones de una asociación"""
+def get_association_ratings(association_id, cursor=None, limit=DEFAULT_RATINGS_PAGE_SIZE):
+    """Obtener una página de valoraciones de una asociación con el resumen y el histograma"""
     try:
-        ratings = RatingService.get_association_ratings(association_id)
+        try:
+            ratings, next_cursor = RatingService.get_association_ratings(association_id, cursor=cursor, limit=limit)
+        except (ValueError, TypeError):
+            return {
+                "success": False,
+                "message": "Cursor de paginación inválido"
+            }, 400
+        
         summary = RatingService.get_rating_summary(association_id)
+        histogram = RatingService.get_rating_histogram(association_id)
         
         return {
             "success": True,
             "summary": summary,
-            "ratings": [rating.serialize() for rating in ratings]
+            "histogram": histogram,
+            "ratings": [rating.serialize() for rating in ratings],
+            "next_cursor": next_cursor
         }
     
     except Exception as e:
@@ -89,17 +98,8 @@ def create_rating(rating_data):
                 "message": "Valoración debe ser entre 1 y 5"
             }, 400
         
-        # Verificar si puede valorar este evento específico
-        can_rate = RatingService.can_user_rate_event(current_user_id, event_id)
-        
-        if not can_rate:
-            return {
-                "success": False,
-                "message": "No puedes valorar este evento (no fuiste voluntario, no ha terminado, o ya lo valoraste)"
-            }, 403
-        
-        # Crear valoración
-        new_rating = RatingService.create_rating(
+        # Comprobar permisos e insertar en una sola sentencia (sin duplicados)
+        new_rating = RatingService.rate_event(
             rating=rating_value,
             user_id=current_user_id,
             association_id=association_id,
@@ -107,6 +107,12 @@ def create_rating(rating_data):
             comment=comment
         )
         
+        if not new_rating:
+            return {
+                "success": False,
+                "message": "No puedes valorar este evento (no fuiste voluntario, no ha terminado, o ya lo valoraste)"
+            }, 403
+        
         return {
             "success": True,
             "message": "Valoración creada exitosamente",
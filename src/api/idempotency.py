@@ -0,0 +1,119 @@
+"""
+Claves de idempotencia para los POST que crean recursos.
+
+Si el cliente envía la cabecera Idempotency-Key, la primera petición reserva
+la clave (por usuario y endpoint) y al terminar guarda su respuesta. Los
+reintentos con la misma clave reciben esa respuesta guardada sin volver a
+ejecutar la vista, así que no se crean filas ni objetos de Stripe duplicados.
+
+- Misma clave con otro cuerpo: 422.
+- Misma clave mientras la primera petición sigue en curso: 409.
+- Las respuestas 5xx no se guardan: el cliente puede reintentar.
+- Las claves caducan a las IDEMPOTENCY_KEY_TTL_SECONDS (24 h por defecto).
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import Response, current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from .models import db, IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+DEFAULT_IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 60 * 60
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def purge_expired_idempotency_keys():
+    """Borrar las claves caducadas (sin commit). Devuelve cuántas se borraron"""
+    result = db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at < _utcnow())
+    )
+    return result.rowcount
+
+
+def _reserve_key(scope, key, request_hash):
+    """Insertar la clave como "en curso". Devuelve None si se reservó o la fila existente"""
+    now = _utcnow()
+    ttl = current_app.config.get("IDEMPOTENCY_KEY_TTL_SECONDS", DEFAULT_IDEMPOTENCY_KEY_TTL_SECONDS)
+
+    purge_expired_idempotency_keys()
+    db.session.add(IdempotencyKey(
+        scope=scope,
+        key=key,
+        request_hash=request_hash,
+        created_at=now,
+        expires_at=now + timedelta(seconds=ttl)
+    ))
+    try:
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    return IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+
+
+def idempotent(view):
+    """Decorador para vistas POST autenticadas (debajo de @jwt_required)"""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+
+        if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({"error": f"{IDEMPOTENCY_HEADER} no puede superar {MAX_IDEMPOTENCY_KEY_LENGTH} caracteres"}), 400
+
+        scope = f"{get_jwt_identity()}:{request.method}:{request.path}"
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        existing = _reserve_key(scope, key, request_hash)
+        if existing is not None:
+            if existing.request_hash != request_hash:
+                return jsonify({"error": f"{IDEMPOTENCY_HEADER} ya usada con otra petición"}), 422
+            if existing.status_code is None:
+                return jsonify({"error": "La petición original con esta clave sigue en curso"}), 409
+
+            response = Response(existing.response_body, status=existing.status_code, mimetype=existing.mimetype)
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            _release_key(scope, key)
+            raise
+
+        if response.status_code >= 500:
+            # Error del servidor: liberar la clave para permitir el reintento
+            _release_key(scope, key)
+            return response
+
+        db.session.rollback()
+        stored = IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+        if stored is not None:
+            stored.status_code = response.status_code
+            stored.response_body = response.get_data(as_text=True)
+            stored.mimetype = response.mimetype
+            db.session.commit()
+
+        return response
+
+    return wrapper
+
+
+def _release_key(scope, key):
+    db.session.rollback()
+    db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+    )
+    db.session.commit()
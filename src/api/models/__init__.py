@@ -7,4 +7,9 @@ from .user import User
 from .association import Association
 from .event_volunteers import EventVolunteer
 from .donation import Donation
+from .donation_rollup import DonationDailyRollup
 from .rating import Rating
+from .cache_version import CacheVersion
+from .stripe_webhook_event import StripeWebhookEvent
+from .idempotency_key import IdempotencyKey
+from .association_leaderboard import AssociationLeaderboard
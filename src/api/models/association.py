@@ -1,16 +1,28 @@
-from sqlalchemy import String, ForeignKey, DateTime
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, ForeignKey, DateTime, Integer, Float, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from . import db
+from ..assets import externalize_inline_image, thumbnail_url
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
 class Association(db.Model):
     __tablename__ = 'associations'
+    __table_args__ = (
+        # Filtros y orden del listado filtrado (POST /api/associations/filter)
+        Index('ix_associations_association_type', 'association_type'),
+        Index('ix_associations_name_id', 'name', 'id'),
+        # Asociación de un usuario (login, nombre del donante en estadísticas y exportaciones)
+        Index('ix_associations_user_id', 'user_id'),
+        # Trigramas en PostgreSQL para los filtros city ILIKE '%x%'
+        Index('ix_associations_city_trgm', 'city',
+              postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'}),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False)  # Increased from 50 to 200
     cif: Mapped[str] = mapped_column(String(30), unique=True, nullable=False)
     description: Mapped[str] = mapped_column(String(2000), nullable=False)
+    # Las imágenes en base64 se guardan en el almacén de ficheros y aquí solo queda su URL
     image_url: Mapped[str] = mapped_column(String(20000), nullable=True)
     website_url: Mapped[str] = mapped_column(String(200), nullable=True)
     # New social media fields
@@ -21,7 +33,13 @@ class Association(db.Model):
     social_media_url: Mapped[str] = mapped_column(String(200), nullable=True)
     contact_phone: Mapped[str] = mapped_column(String(20), nullable=True)  # Increased from 15 to 20
     contact_email: Mapped[str] = mapped_column(String(120), nullable=False, unique=False)  # Explicitly set unique=False
+    # Tipo de asociación (p. ej. "social", "medioambiente") y ciudad, usados en los filtros
+    association_type: Mapped[str] = mapped_column(String(100), nullable=True)
+    city: Mapped[str] = mapped_column(String(100), nullable=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+    # Suma y número de valoraciones desnormalizados (se mantienen al crear/editar valoraciones)
+    rating_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0, server_default="0")
+    rating_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     user = relationship("User", back_populates="association")
     events = relationship("Event", back_populates="association", cascade="all, delete-orphan")
     ratings = relationship("Rating", back_populates="association")
@@ -33,7 +51,7 @@ class Association(db.Model):
     def __init__(self, name, cif, description, contact_email, user_id, 
                  image_url=None, website_url=None, social_media_url=None, 
                  contact_phone=None, facebook_url=None, instagram_url=None, 
-                 twitter_url=None):
+                 twitter_url=None, association_type=None, city=None):
         self.name = name
         self.cif = cif
         self.description = description
@@ -46,6 +64,8 @@ class Association(db.Model):
         self.facebook_url = facebook_url
         self.instagram_url = instagram_url
         self.twitter_url = twitter_url
+        self.association_type = association_type
+        self.city = city
 
     def serialize(self):
         try:
@@ -55,6 +75,7 @@ class Association(db.Model):
                 "cif": self.cif,
                 "description": self.description,
                 "image_url": self.image_url,
+                "image_thumbnail_url": thumbnail_url(self.image_url),
                 "website_url": self.website_url,
                 "social_media_url": self.social_media_url,
                 "facebook_url": self.facebook_url,
@@ -62,7 +83,10 @@ class Association(db.Model):
                 "twitter_url": self.twitter_url,
                 "contact_phone": self.contact_phone,
                 "contact_email": self.contact_email,
-                "user_id": self.user_id
+                "association_type": self.association_type,
+                "city": self.city,
+                "user_id": self.user_id,
+                "rating_summary": self.rating_summary()
             }
         except Exception as e:
             # Fallback serialization in case of errors
@@ -72,6 +96,7 @@ class Association(db.Model):
                 "cif": getattr(self, 'cif', ''),
                 "description": getattr(self, 'description', ''),
                 "image_url": getattr(self, 'image_url', None),
+                "image_thumbnail_url": thumbnail_url(getattr(self, 'image_url', None)),
                 "website_url": getattr(self, 'website_url', None),
                 "social_media_url": getattr(self, 'social_media_url', None),
                 "facebook_url": getattr(self, 'facebook_url', None),
@@ -79,9 +104,24 @@ class Association(db.Model):
                 "twitter_url": getattr(self, 'twitter_url', None),
                 "contact_phone": getattr(self, 'contact_phone', None),
                 "contact_email": getattr(self, 'contact_email', ''),
+                "association_type": getattr(self, 'association_type', None),
+                "city": getattr(self, 'city', None),
                 "user_id": getattr(self, 'user_id', None)
             } 
     
+    @validates('image_url')
+    def validate_image_url(self, key, value):
+        """Sacar de la fila las imágenes en línea (data URI). Lanza ValueError si no son válidas"""
+        return externalize_inline_image(value)
+
+    def rating_summary(self):
+        """Promedio y total de valoraciones a partir de los contadores"""
+        rating_count = self.rating_count or 0
+        return {
+            "average_rating": round((self.rating_sum or 0) / rating_count, 1) if rating_count else 0.0,
+            "total_ratings": rating_count
+        }
+    
     def set_password(self, password):
         self.password = generate_password_hash(password)
 
@@ -0,0 +1,35 @@
+from sqlalchemy import Integer, Float, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from datetime import datetime
+from . import db
+from ..assets import thumbnail_url
+
+
+class AssociationLeaderboard(db.Model):
+    """Ranking de asociaciones por puntuación bayesiana.
+
+    Se recalcula entero con `flask refresh-leaderboard` a partir de los
+    contadores rating_sum / rating_count de cada asociación.
+    """
+    __tablename__ = 'association_leaderboard'
+
+    association_id: Mapped[int] = mapped_column(ForeignKey('associations.id'), primary_key=True)
+    rank: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    average_rating: Mapped[float] = mapped_column(Float, nullable=False)
+    rating_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    association = relationship("Association")
+
+    def serialize(self):
+        return {
+            "rank": self.rank,
+            "association_id": self.association_id,
+            "association_name": self.association.name if self.association else None,
+            "association_image_url": thumbnail_url(self.association.image_url) if self.association else None,
+            "score": round(self.score, 3),
+            "average_rating": round(self.average_rating, 1),
+            "rating_count": self.rating_count,
+            "computed_at": self.computed_at.isoformat()
+        }
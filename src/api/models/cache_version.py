@@ -0,0 +1,15 @@
+from sqlalchemy import String, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from . import db
+
+
+class CacheVersion(db.Model):
+    """Contador de versión por ámbito de caché (events, associations, ratings).
+
+    Se incrementa justo después del commit de cualquier escritura que afecte
+    al ámbito, así todos los workers ven el cambio y las ETag se invalidan.
+    """
+    __tablename__ = "cache_versions"
+
+    scope: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
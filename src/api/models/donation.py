@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey, Numeric, DateTime, Text, Enum as SQLEnum
+from sqlalchemy import String, ForeignKey, Numeric, DateTime, Text, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
@@ -11,6 +11,15 @@ class DonationStatus(PyEnum):
 
 class Donation(db.Model):
     __tablename__ = 'donations'
+    __table_args__ = (
+        # Listados por donante, asociación o evento ordenados por fecha (el de
+        # asociación sirve también a las estadísticas de donaciones completadas)
+        Index('ix_donations_donor_created', 'donor_id', 'created_at'),
+        Index('ix_donations_association_created', 'association_id', 'created_at'),
+        Index('ix_donations_event_created', 'event_id', 'created_at'),
+        # Búsqueda desde el webhook de Stripe
+        Index('ix_donations_stripe_session_id', 'stripe_session_id'),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     
@@ -0,0 +1,36 @@
+from sqlalchemy import String, Integer, Numeric, Date, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date
+from . import db
+
+
+class DonationDailyRollup(db.Model):
+    """Totales diarios de donaciones completadas.
+
+    Se actualiza al completar cada donación y se reconstruye con
+    `flask rebuild-donation-rollups`. Las gráficas leen solo esta tabla.
+    """
+    __tablename__ = 'donation_daily_rollups'
+    __table_args__ = (
+        # Totales por evento en los listados
+        Index('ix_donation_daily_rollups_event_id', 'event_id'),
+    )
+
+    association_id: Mapped[int] = mapped_column(ForeignKey('associations.id'), primary_key=True)
+    # 0 = donación directa a la asociación (sin evento); no puede ser NULL por formar parte de la clave
+    event_id: Mapped[int] = mapped_column(Integer, primary_key=True, default=0)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    currency: Mapped[str] = mapped_column(String(3), primary_key=True, default='EUR')
+
+    total_amount: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    donation_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def serialize(self):
+        return {
+            "association_id": self.association_id,
+            "event_id": self.event_id or None,
+            "day": self.day.isoformat(),
+            "currency": self.currency,
+            "total_amount": float(self.total_amount),
+            "donation_count": self.donation_count
+        }
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, DateTime
+from sqlalchemy import ForeignKey, DateTime, Index
 from datetime import datetime, timezone
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from . import db
@@ -7,10 +7,26 @@ from . import db
 class EventVolunteer(db.Model):
 
     __tablename__ = "event_volunteers"
+    __table_args__ = (
+        # La clave primaria empieza por event_id; las consultas por voluntario necesitan su propio índice
+        Index("ix_event_volunteers_volunteer_id", "volunteer_id"),
+        # Paginación del listado de voluntarios de un evento por (joined_at, volunteer_id)
+        Index("ix_event_volunteers_event_joined", "event_id", "joined_at", "volunteer_id"),
+    )
 
     event_id: Mapped[int] = mapped_column(ForeignKey("events.id"), primary_key=True)
     volunteer_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
     joined_at: Mapped[datetime] = mapped_column(DateTime, default=lambda:datetime.now(timezone.utc), nullable=False)
 
     event = relationship("Event", back_populates="event_volunteers")
-    volunteer = relationship("User", back_populates="event_volunteers")
\ No newline at end of file
+    volunteer = relationship("User", back_populates="event_volunteers")
+
+    def serialize(self):
+        """Datos públicos del voluntario inscrito (avatar y fecha de inscripción)"""
+        return {
+            "id": self.volunteer.id,
+            "name": self.volunteer.name,
+            "lastname": self.volunteer.lastname,
+            "profile_image": self.volunteer.profile_image,
+            "joined_at": self.joined_at.isoformat() if self.joined_at else None
+        }
@@ -1,11 +1,23 @@
-from sqlalchemy import String, ForeignKey, Text, DateTime, Integer, Boolean
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, ForeignKey, Text, DateTime, Integer, Boolean, Index, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship, joinedload
 from datetime import datetime, timezone
 from . import db
+from ..assets import thumbnail_url
 
 
 class Event(db.Model):
     __tablename__ = "events"
+    __table_args__ = (
+        # Listado por asociación y ordenado por fecha
+        Index("ix_events_active_association_date", "is_active", "association_id", "date"),
+        # Listado general paginado por (date, id): solo interesan los eventos activos
+        Index("ix_events_active_date_id", "date", "id",
+              postgresql_where=text("is_active = true"), sqlite_where=text("is_active = 1")),
+        Index("ix_events_event_type", "event_type"),
+        # Trigramas en PostgreSQL para los filtros city ILIKE '%x%'
+        Index("ix_events_city_trgm", "city",
+              postgresql_using="gin", postgresql_ops={"city": "gin_trgm_ops"}),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -23,6 +35,9 @@ class Event(db.Model):
         ForeignKey("associations.id"), nullable=False)
     max_volunteers: Mapped[int] = mapped_column(
         Integer, nullable=True, default=None)
+    # Recuento desnormalizado de event_volunteers (se mantiene en join/leave)
+    volunteers_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
 
     association = relationship("Association", back_populates="events")
     event_volunteers = relationship(
@@ -36,6 +51,40 @@ class Event(db.Model):
     def volunteers(self):
         return [ev.volunteer for ev in self.event_volunteers]
 
+    @staticmethod
+    def summary_load_options():
+        """Opciones de carga para listados: asociación en el mismo SELECT
+        (el recuento de voluntarios ya está en la propia fila)"""
+        return (
+            joinedload(Event.association),
+        )
+
+    def serialize_summary(self):
+        """Serialización compacta para listados: sin el array de voluntarios, solo el recuento"""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "image_url": self.image_url,
+            "date": self.date.isoformat() if self.date else None,
+            "city": self.city,
+            "address": self.address,
+            "event_type": self.event_type,
+            "is_active": self.is_active,
+            "association_id": self.association_id,
+            "association_name": self.association.name if self.association else None,
+            "association_image_url": thumbnail_url(self.association.image_url) if self.association else None,
+            "max_volunteers": self.max_volunteers,
+            "Volunteers_count": self.volunteers_count or 0
+        }
+
+    def serialize_detail(self, volunteers_preview):
+        """Serialización del detalle: el recuento y solo los primeros voluntarios
+        (el listado completo se pagina en /api/events/<id>/volunteers)"""
+        data = self.serialize_summary()
+        data["volunteers"] = [ev.serialize() for ev in volunteers_preview if ev.volunteer]
+        return data
+
     def serialize(self):
         try:
             return {
@@ -50,18 +99,11 @@ class Event(db.Model):
                 "is_active": self.is_active,
                 "association_id": self.association_id,
                 "association_name": self.association.name if self.association else None,
-                "association_image_url": self.association.image_url if self.association else None,
+                "association_image_url": thumbnail_url(self.association.image_url) if self.association else None,
                 "max_volunteers": self.max_volunteers,
-                "Volunteers_count": len(self.event_volunteers) if self.event_volunteers else 0,
+                "Volunteers_count": self.volunteers_count or 0,
                 "volunteers": [
-                    {
-                        "id": ev.volunteer.id,
-                        "name": ev.volunteer.name,
-                        "lastname": ev.volunteer.lastname,
-                        "profile_image": ev.volunteer.profile_image,
-                        "joined_at": ev.joined_at.isoformat() if ev.joined_at else None
-                    }
-                    for ev in self.event_volunteers if ev.volunteer
+                    ev.serialize() for ev in self.event_volunteers if ev.volunteer
                 ] if self.event_volunteers else []
             }
         except Exception as e:
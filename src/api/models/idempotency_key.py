@@ -0,0 +1,28 @@
+from sqlalchemy import String, Integer, DateTime, Text, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from . import db
+
+
+class IdempotencyKey(db.Model):
+    """Respuesta guardada para una cabecera Idempotency-Key.
+
+    `scope` identifica al usuario y al endpoint; mientras la petición original
+    está en curso `status_code` es NULL. Las filas caducan en `expires_at`.
+    """
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        UniqueConstraint('scope', 'key', name='uq_idempotency_keys_scope_key'),
+        # Borrado de claves caducadas
+        Index('ix_idempotency_keys_expires_at', 'expires_at'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    scope: Mapped[str] = mapped_column(String(255), nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[str] = mapped_column(Text, nullable=True)
+    mimetype: Mapped[str] = mapped_column(String(100), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
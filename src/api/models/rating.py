@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, Float, String, ForeignKey, DateTime, Text
+from sqlalchemy import Integer, Float, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, timezone
 from . import db
@@ -6,6 +6,11 @@ from . import db
 
 class Rating(db.Model):
     __tablename__ = "ratings"
+    __table_args__ = (
+        # Una sola valoración por usuario y evento
+        Index("ix_ratings_user_event", "user_id", "event_id", unique=True),
+        Index("ix_ratings_association_created", "association_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     rating: Mapped[float] = mapped_column(Float, nullable=False)
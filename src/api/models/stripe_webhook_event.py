@@ -0,0 +1,36 @@
+from sqlalchemy import String, Integer, DateTime, Text, Index, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime, timezone
+from enum import Enum as PyEnum
+from . import db
+
+
+class WebhookEventStatus(PyEnum):
+    PENDING = "pending"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+
+class StripeWebhookEvent(db.Model):
+    """Bandeja de entrada de webhooks de Stripe.
+
+    El endpoint solo verifica la firma y guarda el evento; el procesamiento
+    se hace después y de forma idempotente (un evento de Stripe = una fila).
+    Si falla se reintenta a partir de next_attempt_at (espera exponencial).
+    """
+    __tablename__ = 'stripe_webhook_events'
+    __table_args__ = (
+        # Lectura de pendientes en orden de llegada
+        Index('ix_stripe_webhook_events_status_id', 'status', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    stripe_event_id: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    event_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[WebhookEventStatus] = mapped_column(SQLEnum(WebhookEventStatus), default=WebhookEventStatus.PENDING, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    received_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    processed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
@@ -8,7 +8,7 @@ class User(db.Model):
     __tablename__ = 'users'
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    email: Mapped[str] = mapped_column(String(120), nullable=False)
+    email: Mapped[str] = mapped_column(String(120), nullable=False, index=True)
     password: Mapped[str] = mapped_column(String(255), nullable=False)
     name: Mapped[str] = mapped_column(String(100), nullable=True)
     lastname: Mapped[str] = mapped_column(String(100), nullable=True)
@@ -0,0 +1,20 @@
+from flask import Blueprint, jsonify, send_file
+from ..assets import get_asset_path, ASSET_FILENAME_PATTERN, ASSET_MIMETYPES
+
+asset_bp = Blueprint('assets', __name__)
+
+# Un año: el nombre del fichero es el hash de su contenido y nunca cambia
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
+
+# Imágenes del almacén de ficheros (originales y miniaturas)
+@asset_bp.route('/<filename>', methods=['GET'])
+def get_asset(filename):
+    path = get_asset_path(filename)
+    if path is None:
+        return jsonify({"error": "Recurso no encontrado"}), 404
+
+    extension = ASSET_FILENAME_PATTERN.match(filename)['ext']
+    response = send_file(path, mimetype=ASSET_MIMETYPES[extension], max_age=ASSET_MAX_AGE, etag=filename.split('.')[0])
+    response.headers["Cache-Control"] = f"public, max-age={ASSET_MAX_AGE}, immutable"
+    return response
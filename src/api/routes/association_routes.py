@@ -5,12 +5,15 @@ from ..controllers.association_controller import (
     filter_associations_post
 )
 from ..models import Event, EventVolunteer, db
+from ..cache import cached_response
+from ..services.leaderboard_service import LeaderboardService, DEFAULT_LEADERBOARD_SIZE, MAX_LEADERBOARD_SIZE
 from sqlalchemy import func
 
 association_bp = Blueprint('associations', __name__)
 
 # Obtener todas las asociaciones
 @association_bp.route('/', methods=['GET'])
+@cached_response('associations')
 def get_all_endpoint():
     result = get_all_associations()
     status_code = 200 if result['success'] else 400
@@ -18,11 +21,27 @@ def get_all_endpoint():
 
 # Obtener asociación por ID
 @association_bp.route('/<int:association_id>', methods=['GET'])
+@cached_response('associations')
 def get_by_id_endpoint(association_id):
     result = get_association_by_id(association_id)
     status_code = 200 if result.get('success') else result.get('status', 400)
     return jsonify(result), status_code
 
+# Ranking de asociaciones mejor valoradas (se recalcula con `flask refresh-leaderboard`)
+@association_bp.route('/leaderboard', methods=['GET'])
+@cached_response('leaderboard')
+def get_leaderboard_endpoint():
+    limit = request.args.get('limit', DEFAULT_LEADERBOARD_SIZE, type=int)
+    if limit < 1:
+        return jsonify({"success": False, "message": "limit debe ser mayor que 0"}), 400
+    
+    entries = LeaderboardService.get_top(min(limit, MAX_LEADERBOARD_SIZE))
+    return jsonify({
+        "success": True,
+        "count": len(entries),
+        "leaderboard": [entry.serialize() for entry in entries]
+    }), 200
+
 # Obtener estadísticas de asociaciones
 @association_bp.route('/statistics', methods=['GET'])
 def get_associations_statistics():
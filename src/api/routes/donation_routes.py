@@ -1,14 +1,20 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from ..services.donation_service import DonationService
+from ..services.donation_service import DonationService, DEFAULT_DONATIONS_PAGE_SIZE, MAX_DONATIONS_PAGE_SIZE
+from ..services.donation_rollup_service import DonationRollupService, GRANULARITIES
+from ..services.stripe_webhook_service import StripeWebhookService
+from ..services.donor_tax_export_service import DonorTaxExportService, TAX_EXPORT_FORMATS
 from ..models.donation import Donation, DonationStatus
 from ..models import db
+from ..idempotency import idempotent
+from datetime import date, datetime
 
 donation_bp = Blueprint('donation', __name__)
 
 
 @donation_bp.route('/create', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_donation():
     """
     Crear donación y obtener link de pago
@@ -79,10 +85,21 @@ def create_donation():
     except Exception as e:
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+def _process_webhook_after_response(app, inbox_id):
+    """Procesar el evento guardado una vez enviada la respuesta a Stripe.
+    Si falla aquí queda pendiente para `flask process-stripe-webhooks`."""
+    with app.app_context():
+        try:
+            StripeWebhookService.process_event(inbox_id)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Webhook {inbox_id} queda pendiente: {e}")
+
 @donation_bp.route('/webhook', methods=['POST'])
 def stripe_webhook():
     """
-    Webhook de Stripe para confirmar pagos automáticamente
+    Webhook de Stripe para confirmar pagos automáticamente.
+    Solo verifica y guarda el evento; se procesa después de responder 200.
     """
     try:
         stripe_signature = request.headers.get('Stripe-Signature')
@@ -91,18 +108,21 @@ def stripe_webhook():
         
         payload = request.get_data()
         
-        # Procesar webhook
-        result = DonationService.process_stripe_webhook(payload, stripe_signature)
+        # Guardar webhook en la bandeja de entrada
+        result = StripeWebhookService.receive_webhook(payload, stripe_signature)
+        
+        if result and result['status'] == 'error':
+            return jsonify(result), 400
         
-        if result:
-            if result['status'] == 'success':
-                return jsonify(result), 200
-            elif result['status'] == 'error':
-                return jsonify(result), 400
-            else:  # ignored
-                return jsonify({'status': 'received'}), 200
+        response = jsonify({'status': 'received', 'message': 'Webhook recibido'})
         
-        return jsonify({'status': 'received', 'message': 'Webhook recibido'}), 200
+        # Los reenvíos de un evento ya guardado no se vuelven a procesar
+        if result and result['inbox_id']:
+            app = current_app._get_current_object()
+            inbox_id = result['inbox_id']
+            response.call_on_close(lambda: _process_webhook_after_response(app, inbox_id))
+        
+        return response, 200
         
     except Exception as e:
         print(f"Webhook error: {e}")
@@ -111,20 +131,20 @@ def stripe_webhook():
 @donation_bp.route('', methods=['GET'])
 def get_donations():
     """
-    Obtener donaciones con filtros opcionales
+    Obtener donaciones con filtros opcionales (paginadas, más recientes primero)
     Query params:
     - donation_id: donación específica por ID
     - user_id: donaciones de un usuario específico
     - association_id: donaciones recibidas por una asociación  
     - event_id: donaciones hechas a través de un evento
     - status: filtrar por estado (pending, completed, failed)
+    - from / to: rango de fechas de creación (ISO 8601)
+    - min_amount / max_amount: rango de importe
+    - limit: donaciones por página (por defecto 50, máximo 200)
+    - cursor: valor next_cursor de la página anterior
     """
     try:
         donation_id = request.args.get('donation_id', type=int)
-        user_id = request.args.get('user_id', type=int)
-        association_id = request.args.get('association_id', type=int)
-        event_id = request.args.get('event_id', type=int)
-        status = request.args.get('status')
         
         # Si se especifica donation_id, devolver solo esa donación
         if donation_id:
@@ -137,22 +157,43 @@ def get_donations():
                 'count': 1
             }), 200
         
-        # Filtros normales
-        if user_id:
-            donations = DonationService.get_donations_by_user(user_id)
-        elif association_id:
-            donations = DonationService.get_donations_by_association(association_id)
-        elif event_id:
-            donations = DonationService.get_donations_by_event(event_id)
-        else:
-            donations = DonationService.get_all_donations()
-        
+        status = request.args.get('status')
         if status:
-            donations = [d for d in donations if d.status.value == status]
+            try:
+                status = DonationStatus(status)
+            except ValueError:
+                return jsonify({'error': 'status debe ser pending, completed o failed'}), 400
+        
+        try:
+            date_from = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+            date_to = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({'error': 'Las fechas deben tener formato ISO 8601'}), 400
+        
+        limit = request.args.get('limit', DEFAULT_DONATIONS_PAGE_SIZE, type=int)
+        if limit < 1:
+            return jsonify({'error': 'limit debe ser mayor que 0'}), 400
+        
+        try:
+            donations, next_cursor = DonationService.find_donations(
+                user_id=request.args.get('user_id', type=int),
+                association_id=request.args.get('association_id', type=int),
+                event_id=request.args.get('event_id', type=int),
+                status=status,
+                date_from=date_from,
+                date_to=date_to,
+                min_amount=request.args.get('min_amount', type=float),
+                max_amount=request.args.get('max_amount', type=float),
+                cursor=request.args.get('cursor'),
+                limit=min(limit, MAX_DONATIONS_PAGE_SIZE)
+            )
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Cursor de paginación inválido'}), 400
         
         return jsonify({
             'donations': [d.serialize() for d in donations],
-            'count': len(donations)
+            'count': len(donations),
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
@@ -180,6 +221,88 @@ def get_donation_statistics():
     except Exception as e:
         return jsonify({'error': str(e)}), 500 
 
+@donation_bp.route('/tax-export', methods=['GET'])
+@jwt_required()
+def export_donor_tax_summary():
+    """
+    Exportar el resumen anual por donante para el Modelo 182 (solo asociaciones)
+    Query params:
+    - year: ejercicio fiscal (por defecto, el año anterior)
+    - format: csv (por defecto) o fixed (ancho fijo)
+    
+    Ejemplo: GET /api/donations/tax-export?year=2025&format=fixed
+    """
+    claims = get_jwt()
+    if claims.get('role') != 'association':
+        return jsonify({'success': False, 'message': 'Solo las asociaciones pueden exportar sus donaciones'}), 403
+    
+    association_data = claims.get('association')
+    if not association_data or not association_data.get('id'):
+        return jsonify({'success': False, 'message': 'Error de autenticación: Datos de asociación no encontrados.'}), 401
+    
+    association_id = association_data['id']
+    fiscal_year = request.args.get('year', datetime.now().year - 1, type=int)
+    export_format = request.args.get('format', 'csv')
+    
+    if export_format not in TAX_EXPORT_FORMATS:
+        return jsonify({'error': 'format debe ser csv o fixed'}), 400
+    
+    try:
+        lines = DonorTaxExportService.iter_export(association_id, fiscal_year, export_format)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    extension = 'txt' if export_format == 'fixed' else 'csv'
+    return Response(
+        stream_with_context(lines),
+        mimetype='text/plain' if export_format == 'fixed' else 'text/csv',
+        headers={'Content-Disposition': f'attachment; filename=modelo182_{fiscal_year}.{extension}'}
+    )
+
+@donation_bp.route('/timeseries', methods=['GET'])
+def get_donation_timeseries():
+    """
+    Obtener la evolución de donaciones completadas (lee solo los totales diarios)
+    Query params:
+    - association_id: serie de una asociación específica
+    - event_id: serie de un evento específico
+    - granularity: day (por defecto), week o month
+    - from / to: rango de fechas YYYY-MM-DD (ambos incluidos)
+    
+    Ejemplo: GET /api/donations/timeseries?association_id=1&granularity=month
+    """
+    try:
+        association_id = request.args.get('association_id', type=int)
+        event_id = request.args.get('event_id', type=int)
+        granularity = request.args.get('granularity', 'day')
+        
+        if granularity not in GRANULARITIES:
+            return jsonify({'error': 'granularity debe ser day, week o month'}), 400
+        
+        try:
+            date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+            date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({'error': 'Las fechas deben tener el formato YYYY-MM-DD'}), 400
+        
+        series = DonationRollupService.get_timeseries(
+            association_id=association_id,
+            event_id=event_id,
+            granularity=granularity,
+            date_from=date_from,
+            date_to=date_to
+        )
+        
+        return jsonify({
+            'association_id': association_id,
+            'event_id': event_id,
+            'granularity': granularity,
+            'series': series
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @donation_bp.route('/complete/<int:donation_id>', methods=['POST'])
 @jwt_required()
 def complete_donation_manual(donation_id):
@@ -202,7 +325,7 @@ def complete_donation_manual(donation_id):
             return jsonify({'message': f'La donación ya está {donation.status.value}'}), 200
         
         # Completar donación
-        donation.complete_donation()
+        DonationService.mark_donation_completed(donation)
         db.session.commit()
         
         return jsonify({
@@ -1,59 +1,183 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from ..models import db, Event
+from ..models import db, Event, EventVolunteer
 from datetime import datetime
+import csv
+import io
+import json
 from ..schemas.event_schema import check_event_data
-from sqlalchemy import desc, asc
+from ..utils import encode_cursor, decode_cursor
+from ..services.event_search_service import EventSearchService
+from ..services.event_import_service import EventImportService, MAX_IMPORT_ROWS
+from ..services.donation_rollup_service import DonationRollupService
+from ..cache import cached_response
+from ..idempotency import idempotent
+from sqlalchemy import desc, asc, and_, or_
+from sqlalchemy.orm import joinedload
 
 events_bp = Blueprint("events", __name__)
 
+# Tamaño máximo de página permitido en la paginación por cursor
+MAX_EVENTS_PAGE_SIZE = 100
+
+# Voluntarios incluidos en el detalle de un evento
+VOLUNTEERS_PREVIEW_SIZE = 12
+
+# Filas leídas por lote en la exportación y columnas del CSV
+EXPORT_BATCH_SIZE = 500
+EXPORT_CSV_FIELDS = [
+    "id", "title", "description", "image_url", "date", "city", "address",
+    "event_type", "is_active", "association_id", "association_name",
+    "max_volunteers", "Volunteers_count"
+]
+
+
+def _filtered_events_query(args):
+    """Consulta de eventos activos con los filtros comunes de la URL
+    (association_id, city, event_type). Lanza ValueError si el ID de
+    asociación no es un número."""
+    association_id_param = args.get('association_id')
+    city_filter = args.get('city')
+    event_type_filter = args.get('event_type')
+
+    # 1. Iniciar la consulta base: Solo eventos activos
+    query = Event.query.options(*Event.summary_load_options()).filter_by(is_active=True)
+
+    # 2. Aplicar filtro por ID de asociación si está presente
+    if association_id_param:
+        query = query.filter_by(association_id=int(association_id_param))
+
+    # 3. Aplicar filtro de ciudad si está presente y no está vacío
+    if city_filter:
+        query = query.filter(Event.city.ilike(f"%{city_filter}%"))
+
+    # 4. Aplicar filtro de tipo de evento si está presente y no está vacío
+    # Asumimos una coincidencia exacta para el tipo de evento.
+    if event_type_filter:
+        query = query.filter(Event.event_type == event_type_filter)
+
+    return query
+
+
+def _serialize_event_summaries(events, include_donations=False):
+    """Serializar un listado de eventos; con include_donations añade a cada uno
+    lo recaudado (una sola consulta agrupada para toda la página)"""
+    serialized_events = [event.serialize_summary() for event in events]
+    if include_donations:
+        totals = DonationRollupService.get_event_totals(event["id"] for event in serialized_events)
+        for event in serialized_events:
+            event["donations"] = totals.get(event["id"], [])
+    return serialized_events
+
 
 @events_bp.route("/", methods=["GET"])
 @jwt_required(optional=True)
+@cached_response("events", "donations")
 def get_all_events(): 
-    """Obtener todos los eventos disponibles con filtros sencillos."""
+    """Obtener todos los eventos disponibles con filtros sencillos.
+
+    Si se envía `limit` la respuesta se pagina por cursor sobre (date, id):
+    devuelve {"events": [...], "next_cursor": "..."} y la siguiente página
+    se pide pasando ese valor en `cursor`.
+
+    Si se envía `q` se busca en título, descripción, ciudad y tipo de evento
+    y los resultados se ordenan por relevancia (como máximo `limit`).
+
+    Con `include_donations=true` cada evento incluye "donations": una lista con
+    el total recaudado y el número de donaciones completadas por moneda
+    ([{"currency": "EUR", "total_amount": ..., "donation_count": ...}]).
+    """
     
     try:
         # Obtener los parámetros de consulta de la URL (si no existen, serán None)
-        association_id_param = request.args.get('association_id')
-        city_filter = request.args.get('city')
-        event_type_filter = request.args.get('event_type')
         sort_by_date = request.args.get('sort_by_date') # No ponemos 'newest' por defecto aquí. Lo gestionará el frontend.
-
-        # 1. Iniciar la consulta base: Solo eventos activos
-        query = Event.query.filter_by(is_active=True)
-
-        # 2. Aplicar filtro por ID de asociación si está presente y es válido
-        if association_id_param:
+        limit_param = request.args.get('limit')
+        cursor_param = request.args.get('cursor')
+        search_text = (request.args.get('q') or '').strip()
+        include_donations = request.args.get('include_donations', '').lower() in ('1', 'true')
+
+        # 1-4. Eventos activos filtrados por asociación, ciudad y tipo
+        try:
+            query = _filtered_events_query(request.args)
+        except ValueError:
+            # Si el ID de asociación no es un número, devolvemos un error.
+            return jsonify({"error": "ID de asociación inválido."}), 400
+
+        # 5. Validar el tamaño de página si se ha indicado
+        limit = None
+        if limit_param is not None:
             try:
-                association_id = int(association_id_param)
-                query = query.filter_by(association_id=association_id)
+                limit = int(limit_param)
             except ValueError:
-                # Si el ID de asociación no es un número, devolvemos un error.
-                return jsonify({"error": "ID de asociación inválido."}), 400
+                return jsonify({"error": "El parámetro limit debe ser un número entero."}), 400
+            if limit < 1:
+                return jsonify({"error": "El parámetro limit debe ser mayor que 0."}), 400
+            limit = min(limit, MAX_EVENTS_PAGE_SIZE)
+
+        # 6. Búsqueda por texto: resultados ordenados por relevancia
+        if search_text:
+            if cursor_param:
+                return jsonify({"error": "La búsqueda por texto no admite paginación por cursor."}), 400
+            query = EventSearchService.apply_search(query, search_text)
+            query = query.limit(limit or MAX_EVENTS_PAGE_SIZE)
+
+        # 7. Paginación por cursor (keyset) si se pide un límite
+        elif limit is not None:
+            newest_first = sort_by_date == 'newest'
+
+            if cursor_param:
+                try:
+                    cursor_date, cursor_id = decode_cursor(cursor_param, 2)
+                    cursor_date = datetime.fromisoformat(cursor_date)
+                    cursor_id = int(cursor_id)
+                except (ValueError, TypeError):
+                    return jsonify({"error": "Cursor de paginación inválido."}), 400
+
+                # Continuar justo después del último evento de la página anterior
+                if newest_first:
+                    query = query.filter(or_(
+                        Event.date < cursor_date,
+                        and_(Event.date == cursor_date, Event.id < cursor_id)
+                    ))
+                else:
+                    query = query.filter(or_(
+                        Event.date > cursor_date,
+                        and_(Event.date == cursor_date, Event.id > cursor_id)
+                    ))
+
+            if newest_first:
+                query = query.order_by(desc(Event.date), desc(Event.id))
+            else:
+                query = query.order_by(asc(Event.date), asc(Event.id))
+
+            # Pedimos un evento de más para saber si existe otra página
+            events = query.limit(limit + 1).all()
+            has_more = len(events) > limit
+            events = events[:limit]
+
+            next_cursor = None
+            if has_more:
+                last_event = events[-1]
+                next_cursor = encode_cursor(last_event.date, last_event.id)
 
-        # 3. Aplicar filtro de ciudad si está presente y no está vacío
-        if city_filter:
-            query = query.filter(Event.city.ilike(f"%{city_filter}%"))
-
-        # 4. Aplicar filtro de tipo de evento si está presente y no está vacío
-        # Asumimos una coincidencia exacta para el tipo de evento.
-        if event_type_filter:
-            query = query.filter(Event.event_type == event_type_filter)
+            return jsonify({
+                "events": _serialize_event_summaries(events, include_donations),
+                "next_cursor": next_cursor
+            }), 200
 
-        # 5. Aplicar ordenación por fecha si está presente
-        if sort_by_date == 'newest':
+        # 8. Aplicar ordenación por fecha si está presente
+        elif sort_by_date == 'newest':
             query = query.order_by(desc(Event.date)) # Más recientes primero
         elif sort_by_date == 'oldest':
             query = query.order_by(asc(Event.date)) # Más antiguos primero
 
-        # 6. Ejecutar la consulta
+        # 9. Ejecutar la consulta
         events = query.all()
 
-        # 7. Serializar los resultados
-        serialized_events = [event.serialize() for event in events]
+        # 10. Serializar los resultados
+        serialized_events = _serialize_event_summaries(events, include_donations)
 
-        # 8. Devolver la respuesta
+        # 11. Devolver la respuesta
         if not serialized_events:
             return jsonify({"message": "No se encontraron eventos con los criterios seleccionados.", "events": []}), 200
         else:
@@ -77,28 +201,159 @@ def get_all_events():
             }), 500
 
 
+@events_bp.route("/export", methods=["GET"])
+@jwt_required(optional=True)
+def export_events():
+    """Exportar el catálogo de eventos en streaming (NDJSON o CSV).
+
+    Admite los mismos filtros que el listado (association_id, city,
+    event_type, sort_by_date) y `format=ndjson|csv`. Las filas se leen por
+    lotes con un cursor de servidor, así la memoria no crece con la tabla.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({"error": "Formato no soportado. Usa ndjson o csv."}), 400
+
+    try:
+        query = _filtered_events_query(request.args)
+    except ValueError:
+        return jsonify({"error": "ID de asociación inválido."}), 400
+
+    if request.args.get('sort_by_date') == 'newest':
+        query = query.order_by(desc(Event.date), desc(Event.id))
+    else:
+        query = query.order_by(asc(Event.date), asc(Event.id))
+
+    events = query.yield_per(EXPORT_BATCH_SIZE)
+
+    def generate_ndjson():
+        for event in events:
+            yield json.dumps(event.serialize_summary(), ensure_ascii=False) + "\n"
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for event in events:
+            writer.writerow(event.serialize_summary())
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        yield buffer.getvalue()
+
+    if export_format == 'csv':
+        return Response(
+            stream_with_context(generate_csv()),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=events.csv'}
+        )
+
+    return Response(
+        stream_with_context(generate_ndjson()),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=events.ndjson'}
+    )
+
+
+def _event_hidden_from_requester(event):
+    """Los eventos desactivados solo los ve la asociación propietaria."""
+    if event.is_active:
+        return False
+
+    claims = get_jwt()
+    if not claims or claims.get('role') != 'association':
+        return True
+
+    association_data = claims.get('association')
+    return not association_data or event.association_id != association_data['id']
+
+
+def _roster_query(event_id):
+    """Voluntarios de un evento ordenados por (joined_at, volunteer_id)."""
+    return (
+        EventVolunteer.query
+        .options(joinedload(EventVolunteer.volunteer))
+        .filter_by(event_id=event_id)
+        .order_by(asc(EventVolunteer.joined_at), asc(EventVolunteer.volunteer_id))
+    )
+
+
 @events_bp.route("/<int:event_id>", methods=["GET"])
 @jwt_required(optional=True)
 def get_event(event_id):
-    """Obtener los detalles de un evento específico por su ID."""
-    event = Event.query.get(event_id)
-    if not event:
+    """Obtener los detalles de un evento específico por su ID.
+
+    Incluye el recuento de voluntarios y solo los primeros VOLUNTEERS_PREVIEW_SIZE.
+    """
+    event = Event.query.options(*Event.summary_load_options()).filter_by(id=event_id).first()
+    if not event or _event_hidden_from_requester(event):
+        return jsonify({"error": "Evento no encontrado."}), 404
+
+    volunteers_preview = _roster_query(event_id).limit(VOLUNTEERS_PREVIEW_SIZE).all()
+    return jsonify(event.serialize_detail(volunteers_preview)), 200
+
+
+@events_bp.route("/<int:event_id>/volunteers", methods=["GET"])
+@jwt_required(optional=True)
+def get_event_volunteers(event_id):
+    """Listado paginado de voluntarios de un evento.
+
+    Query params:
+    - limit: voluntarios por página (máximo MAX_EVENTS_PAGE_SIZE)
+    - cursor: valor next_cursor de la página anterior
+    - volunteer_id: comprobar si un voluntario concreto está apuntado
+    """
+    event = Event.query.filter_by(id=event_id).first()
+    if not event or _event_hidden_from_requester(event):
         return jsonify({"error": "Evento no encontrado."}), 404
-    
-    if not event.is_active:
-        claims = get_jwt()
-        if not claims or claims.get('role') != 'association':
-            return jsonify({"error": "Evento no encontrado."}), 404
-        
-        association_data = claims.get('association')
-        if not association_data or event.association_id != association_data['id']:
-            return jsonify({"error": "Evento no encontrado."}), 404
-    
-    return jsonify(event.serialize()), 200
+
+    limit = request.args.get('limit', VOLUNTEERS_PREVIEW_SIZE, type=int)
+    if limit < 1:
+        return jsonify({"error": "El parámetro limit debe ser mayor que 0."}), 400
+    limit = min(limit, MAX_EVENTS_PAGE_SIZE)
+
+    query = _roster_query(event_id)
+
+    volunteer_id = request.args.get('volunteer_id', type=int)
+    if volunteer_id is not None:
+        query = query.filter(EventVolunteer.volunteer_id == volunteer_id)
+
+    cursor_param = request.args.get('cursor')
+    if cursor_param:
+        try:
+            cursor_joined_at, cursor_volunteer_id = decode_cursor(cursor_param, 2)
+            cursor_joined_at = datetime.fromisoformat(cursor_joined_at)
+            cursor_volunteer_id = int(cursor_volunteer_id)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Cursor de paginación inválido."}), 400
+
+        query = query.filter(or_(
+            EventVolunteer.joined_at > cursor_joined_at,
+            and_(EventVolunteer.joined_at == cursor_joined_at,
+                 EventVolunteer.volunteer_id > cursor_volunteer_id)
+        ))
+
+    # Pedimos uno de más para saber si existe otra página
+    volunteers = query.limit(limit + 1).all()
+    has_more = len(volunteers) > limit
+    volunteers = volunteers[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = volunteers[-1]
+        next_cursor = encode_cursor(last.joined_at, last.volunteer_id)
+
+    return jsonify({
+        "event_id": event_id,
+        "count": event.volunteers_count,
+        "volunteers": [ev.serialize() for ev in volunteers if ev.volunteer],
+        "next_cursor": next_cursor
+    }), 200
 
 
 @events_bp.route("/", methods=["POST"])
 @jwt_required()
+@idempotent
 def create_event():
     """Crear un nuevo evento (solo asociaciones)."""
     claims = get_jwt()
@@ -154,6 +409,56 @@ def create_event():
         return jsonify({"error": "Error interno del servidor al crear el evento."}), 500
 
 
+@events_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+def bulk_create_events():
+    """Crear eventos en bloque (solo asociaciones).
+
+    Acepta JSON ({"events": [...]} o una lista) o CSV con cabecera, ya sea
+    como cuerpo text/csv o como archivo en el campo `file`. Las filas válidas
+    se insertan y las inválidas se devuelven con sus errores.
+    """
+    claims = get_jwt()
+
+    if claims.get('role') != 'association':
+        return jsonify({"error": "Permiso denegado. Solo las asociaciones pueden crear eventos."}), 403
+
+    association_data = claims.get('association')
+    if not association_data:
+        return jsonify({"error": "Error de autenticación: Datos de asociación no encontrados."}), 401
+
+    if 'file' in request.files or request.mimetype == 'text/csv':
+        try:
+            if 'file' in request.files:
+                rows = EventImportService.parse_csv(request.files['file'].read().decode('utf-8-sig'))
+            else:
+                rows = EventImportService.parse_csv(request.get_data(as_text=True))
+        except UnicodeDecodeError:
+            return jsonify({"error": "El archivo CSV debe estar codificado en UTF-8."}), 400
+        except csv.Error as e:
+            return jsonify({"error": f"El archivo CSV no es válido: {e}"}), 400
+    else:
+        data = request.get_json(silent=True)
+        rows = data.get('events') if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            return jsonify({"error": "Formato de petición inválido. Se espera una lista de eventos."}), 400
+
+    if not rows:
+        return jsonify({"error": "No se ha enviado ningún evento."}), 400
+
+    if len(rows) > MAX_IMPORT_ROWS:
+        return jsonify({"error": f"Se pueden importar como máximo {MAX_IMPORT_ROWS} eventos por petición."}), 413
+
+    try:
+        result = EventImportService.import_events(rows, association_data['id'])
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Error interno del servidor al importar los eventos."}), 500
+
+    status_code = 201 if result['created'] else 422
+    return jsonify(result), status_code
+
+
 @events_bp.route("/<int:event_id>", methods=["PUT"])
 @jwt_required()
 def update_event(event_id):
@@ -6,6 +6,8 @@ from ..controllers.rating_controller import (
     create_rating,
     update_rating
 )
+from ..services.rating_service import DEFAULT_RATINGS_PAGE_SIZE, MAX_RATINGS_PAGE_SIZE
+from ..cache import cached_response
 
 rating_bp = Blueprint('ratings', __name__)
 
@@ -18,10 +20,19 @@ def check_can_rate_endpoint(association_id):
         return jsonify(result[0]), result[1]
     return jsonify(result), 200
 
-# Obtener todas las valoraciones de una asociación
+# Obtener valoraciones de una asociación (paginadas con ?limit=&cursor=) con resumen e histograma
 @rating_bp.route('/association/<int:association_id>', methods=['GET'])
+@cached_response('ratings')
 def get_association_ratings_endpoint(association_id):
-    result = get_association_ratings(association_id)
+    limit = request.args.get('limit', DEFAULT_RATINGS_PAGE_SIZE, type=int)
+    if limit < 1:
+        return jsonify({"success": False, "message": "limit debe ser mayor que 0"}), 400
+    
+    result = get_association_ratings(
+        association_id,
+        cursor=request.args.get('cursor'),
+        limit=min(limit, MAX_RATINGS_PAGE_SIZE)
+    )
     if isinstance(result, tuple):
         return jsonify(result[0]), result[1]
     return jsonify(result), 200
@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from ..models import db, EventVolunteer,Event
+from ..cache import schedule_cache_bump
 from datetime import datetime, timezone
+from sqlalchemy import update, delete, or_
+from sqlalchemy.exc import IntegrityError
 
 
 volunteers_bp = Blueprint("volunteers", __name__)
@@ -20,30 +23,42 @@ def join_event(event_id):
 
     volunteer_id = current_user_id
 
-    # Obtener el evento para verificar la capacidad
-    event = Event.query.get(event_id)
-    if not event:
-        return jsonify({"message": "Evento no encontrado"}), 404
-
-     # Verificar si el evento ya está lleno
-    if event.max_volunteers is not None and len(event.event_volunteers) >= event.max_volunteers:
+    # Reservar plaza con una única sentencia condicional: el incremento solo se
+    # aplica si queda hueco, y la fila queda bloqueada hasta el commit, así
+    # que peticiones simultáneas nunca superan max_volunteers
+    reserved = db.session.execute(
+        update(Event)
+        .where(
+            Event.id == event_id,
+            or_(Event.max_volunteers.is_(None), Event.volunteers_count < Event.max_volunteers)
+        )
+        .values(volunteers_count=Event.volunteers_count + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if not reserved:
+        db.session.rollback()
+        if not db.session.query(Event.id).filter_by(id=event_id).first():
+            return jsonify({"message": "Evento no encontrado"}), 404
+        # Con el evento lleno, quien ya está apuntado recibe el mismo aviso que con plazas libres
+        if db.session.query(EventVolunteer.event_id).filter_by(event_id=event_id, volunteer_id=volunteer_id).first():
+            return jsonify({"message": "Ya estás apuntado a este evento"}), 400
+        # Verificar si el evento ya está lleno
         return jsonify({"message": "Este evento ha alcanzado su número máximo de voluntarios"}), 400
 
-    existing = EventVolunteer.query.filter_by(
-        event_id=event_id, volunteer_id=volunteer_id
-    ).first()
-
-    if existing:
-        return jsonify({"message": "Ya estás apuntado a este evento"}), 400
-
     ev = EventVolunteer(
         event_id=event_id,
         volunteer_id=volunteer_id,
         joined_at=datetime.now(timezone.utc)
     )
-    
-    db.session.add(ev)
-    db.session.commit()
+
+    try:
+        db.session.add(ev)
+        db.session.commit()
+    except IntegrityError:
+        # La clave primaria (event_id, volunteer_id) ya existe: se deshace también la reserva
+        db.session.rollback()
+        return jsonify({"message": "Ya estás apuntado a este evento"}), 400
 
     return jsonify({
         "message": "Te has apuntado correctamente al evento",
@@ -68,14 +83,28 @@ def leave_event(event_id):
 
     volunteer_id = current_user_id
 
-    ev = EventVolunteer.query.filter_by(
-        event_id=event_id, volunteer_id=volunteer_id
-    ).first()
-
-    if not ev:
+    # Mismo orden de bloqueos que join_event (primero la fila del evento y luego la
+    # inscripción) para que un join y un leave simultáneos no se bloqueen mutuamente
+    db.session.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(volunteers_count=Event.volunteers_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    left = db.session.execute(
+        delete(EventVolunteer).where(
+            EventVolunteer.event_id == event_id,
+            EventVolunteer.volunteer_id == volunteer_id
+        )
+    ).rowcount
+
+    if not left:
+        # No estaba apuntado (o un leave simultáneo ya lo borró): se deshace el decremento
+        db.session.rollback()
         return jsonify({"message": "No estabas apuntado a este evento"}), 404
 
-    db.session.delete(ev)
+    # El delete de Core no pasa por el flush del ORM: invalidar la caché al hacer commit
+    schedule_cache_bump(db.session, ("events",))
     db.session.commit()
     
     return jsonify({
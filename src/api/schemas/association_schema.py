@@ -1,5 +1,6 @@
 import re
 from flask import jsonify
+from ..assets import is_inline_image
 
 def validate_email(email):
     """Validate email format"""
@@ -65,7 +66,8 @@ def validate_association_data(data):
         errors['contact_email'] = 'El email de contacto debe tener máximo 120 caracteres'
     
     # Optional fields
-    if data.get('image_url') and not validate_url(data['image_url']):
+    # Además de URLs se admiten imágenes en base64 (data:image/...), que se pasan al almacén de ficheros
+    if data.get('image_url') and not validate_url(data['image_url']) and not is_inline_image(data['image_url']):
         errors['image_url'] = 'La URL de la imagen no es válida (debe empezar con http:// o https://)'
     
     if data.get('website_url') and len(data['website_url']) > 200:
@@ -1,5 +1,14 @@
-from typing import Optional
+from typing import List, Optional
+from sqlalchemy import and_, or_
 from ..models import Association, db
+from ..utils import encode_cursor, decode_cursor
+
+# Tamaño de página por defecto y máximo del listado filtrado
+DEFAULT_ASSOCIATIONS_PAGE_SIZE = 50
+MAX_ASSOCIATIONS_PAGE_SIZE = 100
+
+# Campos por los que se puede ordenar el listado filtrado
+ASSOCIATION_SORT_FIELDS = ('id', 'name')
 
 class AssociationService:
     @staticmethod
@@ -16,6 +25,8 @@ class AssociationService:
         facebook_url: Optional[str] = None,
         instagram_url: Optional[str] = None,
         twitter_url: Optional[str] = None,
+        association_type: Optional[str] = None,
+        city: Optional[str] = None,
         commit: bool = True
     ) -> Association:
         association = Association(
@@ -30,7 +41,9 @@ class AssociationService:
             contact_phone=contact_phone,
             facebook_url=facebook_url,
             instagram_url=instagram_url,
-            twitter_url=twitter_url
+            twitter_url=twitter_url,
+            association_type=association_type,
+            city=city
         )
         db.session.add(association)
         if commit:
@@ -51,4 +64,62 @@ class AssociationService:
 
     @staticmethod
     def get_association_by_user_id(user_id: int) -> Optional[Association]:
-        return Association.query.filter_by(user_id=user_id).first() 
\ No newline at end of file
+        return Association.query.filter_by(user_id=user_id).first()
+
+    @staticmethod
+    def filter_associations(types: Optional[List[str]] = None, location: Optional[str] = None,
+                            min_id: Optional[int] = None, sort: str = 'id', reverse: bool = False,
+                            cursor: Optional[str] = None, limit: int = DEFAULT_ASSOCIATIONS_PAGE_SIZE):
+        """Filtrar, ordenar y paginar asociaciones en una sola consulta.
+        
+        Pagina por cursor sobre (campo de orden, id). El cursor lleva también
+        el campo y el sentido del orden. Devuelve (asociaciones, next_cursor).
+        Lanza ValueError si el cursor no es válido o no corresponde al orden pedido.
+        """
+        query = Association.query
+        
+        if types:
+            query = query.filter(Association.association_type.in_(types))
+        if location:
+            query = query.filter(Association.city.ilike(f"%{location}%"))
+        if min_id:
+            query = query.filter(Association.id >= min_id)
+        
+        sort_column = Association.name if sort == 'name' else Association.id
+        direction = 'desc' if reverse else 'asc'
+        
+        if cursor:
+            cursor_sort, cursor_direction, cursor_value, cursor_id = decode_cursor(cursor, 4)
+            if cursor_sort != sort or cursor_direction != direction:
+                raise ValueError("El cursor no corresponde al orden pedido")
+            cursor_id = int(cursor_id)
+            if sort == 'id':
+                cursor_value = int(cursor_value)
+            # Continuar justo después de la última asociación de la página anterior
+            if reverse:
+                query = query.filter(or_(
+                    sort_column < cursor_value,
+                    and_(sort_column == cursor_value, Association.id < cursor_id)
+                ))
+            else:
+                query = query.filter(or_(
+                    sort_column > cursor_value,
+                    and_(sort_column == cursor_value, Association.id > cursor_id)
+                ))
+        
+        if reverse:
+            query = query.order_by(sort_column.desc(), Association.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), Association.id.asc())
+        
+        # Pedimos una de más para saber si existe otra página
+        associations = query.limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(associations) > limit:
+            associations = associations[:limit]
+            last = associations[-1]
+            next_cursor = encode_cursor(sort, direction, getattr(last, sort), last.id)
+        
+        return associations, next_cursor
+
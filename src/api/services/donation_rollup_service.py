@@ -0,0 +1,169 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, insert, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from ..models import Donation, DonationDailyRollup, db
+from ..models.donation import DonationStatus
+from ..cache import schedule_cache_bump
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def _period_start(day: date, granularity: str) -> date:
+    """Primer día del periodo (semana empezando en lunes o mes) al que pertenece un día"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+class DonationRollupService:
+
+    @staticmethod
+    def record_completed_donation(donation: Donation) -> None:
+        """Sumar una donación recién completada a su fila diaria (sin hacer commit)"""
+        table = DonationDailyRollup.__table__
+        completed_at = donation.completed_at or donation.created_at
+        values = {
+            'association_id': donation.association_id,
+            'event_id': donation.event_id or 0,
+            'day': completed_at.date(),
+            'currency': donation.currency or 'EUR',
+            'total_amount': donation.amount,
+            'donation_count': 1
+        }
+        key = ['association_id', 'event_id', 'day', 'currency']
+
+        dialect = db.engine.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            stmt = dialect_insert(table).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=key,
+                set_={
+                    'total_amount': table.c.total_amount + stmt.excluded.total_amount,
+                    'donation_count': table.c.donation_count + stmt.excluded.donation_count
+                }
+            )
+            db.session.execute(stmt)
+            # El upsert de Core no pasa por el flush del ORM: invalidar la caché al hacer commit
+            schedule_cache_bump(db.session, ("donations",))
+            return
+
+        rollup = db.session.get(DonationDailyRollup, tuple(values[k] for k in key))
+        if rollup:
+            rollup.total_amount += donation.amount
+            rollup.donation_count += 1
+        else:
+            db.session.add(DonationDailyRollup(**values))
+
+    @staticmethod
+    def rebuild() -> int:
+        """Reconstruir todas las filas diarias a partir de las donaciones completadas"""
+        completed_day = func.date(func.coalesce(Donation.completed_at, Donation.created_at))
+        event_key = func.coalesce(Donation.event_id, 0)
+
+        groups = db.session.query(
+            Donation.association_id,
+            event_key,
+            completed_day,
+            Donation.currency,
+            func.sum(Donation.amount),
+            func.count(Donation.id)
+        ).filter(
+            Donation.status == DonationStatus.COMPLETED
+        ).group_by(
+            Donation.association_id, event_key, completed_day, Donation.currency
+        ).all()
+
+        rows = [
+            {
+                'association_id': association_id,
+                'event_id': event_id,
+                # SQLite devuelve la fecha como texto
+                'day': date.fromisoformat(day) if isinstance(day, str) else day,
+                'currency': currency,
+                'total_amount': total_amount,
+                'donation_count': donation_count
+            }
+            for association_id, event_id, day, currency, total_amount, donation_count in groups
+        ]
+
+        db.session.execute(delete(DonationDailyRollup))
+        if rows:
+            db.session.execute(insert(DonationDailyRollup), rows)
+        schedule_cache_bump(db.session, ("donations",))
+        db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def get_event_totals(event_ids: Iterable[int]) -> Dict[int, List[dict]]:
+        """Total recaudado por evento y moneda para varios eventos en una sola consulta agrupada.
+        No se suman importes de monedas distintas: cada evento tiene una entrada por moneda."""
+        event_ids = [event_id for event_id in event_ids if event_id]
+        if not event_ids:
+            return {}
+
+        rows = db.session.query(
+            DonationDailyRollup.event_id,
+            DonationDailyRollup.currency,
+            func.sum(DonationDailyRollup.total_amount),
+            func.sum(DonationDailyRollup.donation_count)
+        ).filter(
+            DonationDailyRollup.event_id.in_(event_ids)
+        ).group_by(
+            DonationDailyRollup.event_id, DonationDailyRollup.currency
+        ).order_by(DonationDailyRollup.event_id, DonationDailyRollup.currency).all()
+
+        totals = {}
+        for event_id, currency, total_amount, donation_count in rows:
+            totals.setdefault(event_id, []).append({
+                'currency': currency,
+                'total_amount': round(float(total_amount), 2),
+                'donation_count': int(donation_count)
+            })
+        return totals
+
+    @staticmethod
+    def get_timeseries(association_id: Optional[int] = None, event_id: Optional[int] = None,
+                       granularity: str = 'day', date_from: Optional[date] = None,
+                       date_to: Optional[date] = None) -> List[dict]:
+        """Serie temporal de donaciones completadas leyendo solo las filas diarias"""
+        query = db.session.query(
+            DonationDailyRollup.day,
+            DonationDailyRollup.currency,
+            func.sum(DonationDailyRollup.total_amount),
+            func.sum(DonationDailyRollup.donation_count)
+        )
+
+        if association_id:
+            query = query.filter(DonationDailyRollup.association_id == association_id)
+        if event_id:
+            query = query.filter(DonationDailyRollup.event_id == event_id)
+        if date_from:
+            query = query.filter(DonationDailyRollup.day >= date_from)
+        if date_to:
+            query = query.filter(DonationDailyRollup.day <= date_to)
+
+        daily = query.group_by(
+            DonationDailyRollup.day, DonationDailyRollup.currency
+        ).order_by(DonationDailyRollup.day).all()
+
+        # Agrupar los días en semanas o meses (como mucho una fila por día y moneda)
+        buckets = {}
+        for day, currency, total_amount, donation_count in daily:
+            period_key = (_period_start(day, granularity), currency)
+            bucket = buckets.setdefault(period_key, {'total_amount': 0.0, 'donation_count': 0})
+            bucket['total_amount'] += float(total_amount)
+            bucket['donation_count'] += int(donation_count)
+
+        return [
+            {
+                'period': period.isoformat(),
+                'currency': currency,
+                'total_amount': round(bucket['total_amount'], 2),
+                'donation_count': bucket['donation_count']
+            }
+            for (period, currency), bucket in sorted(buckets.items())
+        ]
@@ -1,14 +1,54 @@
 from ..models import Donation, User, Association, Event, db
 from ..models.donation import DonationStatus
+from .donation_rollup_service import DonationRollupService
 from typing import List, Optional
+from sqlalchemy import func, and_, or_
+from sqlalchemy.orm import joinedload
+from datetime import datetime
+from ..utils import encode_cursor, decode_cursor
+from contextlib import contextmanager
+import logging
 import os
+import time
 import stripe
 
-# Configurar Stripe dinámicamente en cada uso
+# Tamaño de página por defecto y máximo del listado de donaciones
+DEFAULT_DONATIONS_PAGE_SIZE = 50
+MAX_DONATIONS_PAGE_SIZE = 200
+
+# Tiempo máximo de espera por llamada a Stripe (segundos)
+STRIPE_TIMEOUT_SECONDS = 20
+
+logger = logging.getLogger(__name__)
+
+_stripe_configured = False
+
+# Configurar Stripe una sola vez por proceso
 def _ensure_stripe_configured():
-    stripe.api_key = os.getenv('STRIPE_SECRET_KEY')  # Configurar cada vez
-    if not stripe.api_key:
+    global _stripe_configured
+    if _stripe_configured:
+        return
+    
+    api_key = os.getenv('STRIPE_SECRET_KEY')
+    if not api_key:
         raise ValueError("STRIPE_SECRET_KEY no configurada en variables de entorno")
+    
+    stripe.api_key = api_key
+    # Permite apuntar a stripe-mock o a un servidor local en pruebas
+    if os.getenv('STRIPE_API_BASE'):
+        stripe.api_base = os.getenv('STRIPE_API_BASE')
+    # Cliente HTTP con sesión requests: reutiliza conexiones (keep-alive) entre llamadas
+    stripe.default_http_client = stripe.RequestsClient(timeout=STRIPE_TIMEOUT_SECONDS)
+    _stripe_configured = True
+
+@contextmanager
+def _timed_stripe_call(operation: str):
+    """Registrar la duración de cada llamada saliente a Stripe"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.info("Stripe %s: %.1f ms", operation, (time.perf_counter() - start) * 1000)
 
 def _get_donation_metadata(donation: Donation) -> dict:
     """Generar metadatos consistentes para Stripe"""
@@ -54,43 +94,37 @@ class DonationService:
         
         return donation
     
-    @staticmethod
-    def create_stripe_price_object(donation: Donation) -> str:
-        """Crear Price Object de Stripe para la donación"""
-        
-        # Crear Product y Price en una sola operación más simple
-        metadata = _get_donation_metadata(donation)
-        price = stripe.Price.create(
-            unit_amount=int(donation.amount * 100),
-            currency='eur',
-            product_data={
-                'name': f'Donación a {donation.association.name}',
-                'metadata': metadata
-            },
-            metadata=metadata
-        )
-        
-        return price.id
-    
     @staticmethod
     def create_stripe_checkout_url(donation: Donation, success_url: str, cancel_url: str) -> str:
-        """Crear URL de checkout de Stripe usando Price Objects"""
+        """Crear URL de checkout de Stripe (una sola llamada: precio y producto en línea)"""
         
         # Verificar configuración de Stripe
         _ensure_stripe_configured()
         
-        # Crear Price Object para esta donación
-        price_id = DonationService.create_stripe_price_object(donation)
-        
-        # Crear sesión de pago con Stripe
-        checkout_session = stripe.checkout.Session.create(
-            payment_method_types=['card'],
-            line_items=[{'price': price_id, 'quantity': 1}],
-            mode='payment',
-            success_url=success_url + f'?donation_id={donation.id}',
-            cancel_url=cancel_url + f'?donation_id={donation.id}',
-            metadata=_get_donation_metadata(donation)
-        )
+        metadata = _get_donation_metadata(donation)
+        
+        # Crear sesión de pago con Stripe; price_data evita crear un Price y un Product por donación
+        with _timed_stripe_call('checkout.Session.create'):
+            checkout_session = stripe.checkout.Session.create(
+                payment_method_types=['card'],
+                line_items=[{
+                    'price_data': {
+                        'currency': (donation.currency or 'EUR').lower(),
+                        'unit_amount': int(round(float(donation.amount) * 100)),
+                        'product_data': {
+                            'name': f'Donación a {donation.association.name}',
+                            'metadata': metadata
+                        }
+                    },
+                    'quantity': 1
+                }],
+                mode='payment',
+                success_url=success_url + f'?donation_id={donation.id}',
+                cancel_url=cancel_url + f'?donation_id={donation.id}',
+                metadata=metadata,
+                # Copia en el PaymentIntent para identificar la donación en payment_intent.payment_failed
+                payment_intent_data={'metadata': metadata}
+            )
         
         # Actualizar donación con información de Stripe y hacer commit final
         donation.stripe_session_id = checkout_session.id
@@ -99,114 +133,116 @@ class DonationService:
         return checkout_session.url
     
     @staticmethod
-    def complete_donation_by_session_id(session_id: str) -> Optional[Donation]:
-        """Completar donación cuando Stripe confirma pago"""
-        donation = Donation.query.filter_by(stripe_session_id=session_id).first()
-        
-        if donation:
-            donation.complete_donation()
-            db.session.commit()
-            return donation
-        
-        return None
+    def mark_donation_completed(donation: Donation) -> bool:
+        """Marcar donación como completada y sumarla a los totales diarios (sin commit).
+        Devuelve False si ya estaba completada, para no contarla dos veces."""
+        if donation.status == DonationStatus.COMPLETED:
+            return False
+        
+        donation.complete_donation()
+        DonationRollupService.record_completed_donation(donation)
+        return True
     
     @staticmethod
-    def process_stripe_webhook(payload: bytes, signature: str) -> Optional[dict]:
-        """Procesar webhook de Stripe"""
-        
-        # Webhook signing secret
-        webhook_secret = os.getenv('STRIPE_WEBHOOK_SECRET')
+    def find_donations(user_id: Optional[int] = None, association_id: Optional[int] = None,
+                       event_id: Optional[int] = None, status: Optional[DonationStatus] = None,
+                       date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                       min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                       cursor: Optional[str] = None, limit: int = DEFAULT_DONATIONS_PAGE_SIZE):
+        """Buscar donaciones filtrando en SQL, de la más reciente a la más antigua.
+        
+        Pagina por cursor sobre (created_at, id) y carga donante, asociación y
+        evento en la misma consulta. Devuelve (donaciones, next_cursor).
+        Lanza ValueError si el cursor no es válido.
+        """
+        query = Donation.query.options(
+            joinedload(Donation.donor).joinedload(User.association),
+            joinedload(Donation.association),
+            joinedload(Donation.event)
+        )
         
-        if not webhook_secret:
-            print("STRIPE_WEBHOOK_SECRET no configurado")
-            return None
-            
-        try:
-            # Verificar la signature del webhook
-            event = stripe.Webhook.construct_event(payload, signature, webhook_secret)
-            
-            # Procesar eventos de pago completado
-            if event['type'] == 'checkout.session.completed':
-                session = event['data']['object']
-                session_id = session['id']
-                
-                donation = DonationService.complete_donation_by_session_id(session_id)
-                
-                if donation:
-                    return {
-                        'status': 'success',
-                        'donation_id': donation.id,
-                        'message': 'Donación completada exitosamente'
-                    }
-                else:
-                    return {
-                        'status': 'error',
-                        'message': 'Donación no encontrada'
-                    }
-                    
-            # Procesar pagos fallidos
-            elif event['type'] == 'payment_intent.payment_failed':
-                # Para pagos fallidos, necesitaríamos otra forma de identificar la donación
-                # Por ahora, simplemente logeamos el evento
-                print(f"Payment failed for payment_intent: {event['data']['object']['id']}")
-                return {
-                    'status': 'success',
-                    'message': 'Pago fallido procesado'
-                }
-            
-            return {'status': 'ignored', 'event_type': event['type']}
-            
-        except ValueError as e:
-            return {'status': 'error', 'message': f'Payload inválido: {e}'}
-        except stripe.error.SignatureVerificationError as e:
-            return {'status': 'error', 'message': f'Signature inválida: {e}'}
-    
-    @staticmethod
-    def get_donations_by_user(user_id: int) -> List[Donation]:
-        """Obtener donaciones hechas por un usuario"""
-        return Donation.query.filter_by(donor_id=user_id).order_by(Donation.created_at.desc()).all()
-    
-    @staticmethod
-    def get_donations_by_association(association_id: int) -> List[Donation]:
-        """Obtener donaciones recibidas por una asociación"""
-        return Donation.query.filter_by(association_id=association_id).order_by(Donation.created_at.desc()).all()
-    
-    @staticmethod
-    def get_donations_by_event(event_id: int) -> List[Donation]:
-        """Obtener donaciones hechas a través de un evento"""
-        return Donation.query.filter_by(event_id=event_id).order_by(Donation.created_at.desc()).all()
-    
-    @staticmethod
-    def get_all_donations() -> List[Donation]:
-        """Obtener todas las donaciones"""
-        return Donation.query.order_by(Donation.created_at.desc()).all()
+        if user_id:
+            query = query.filter(Donation.donor_id == user_id)
+        if association_id:
+            query = query.filter(Donation.association_id == association_id)
+        if event_id:
+            query = query.filter(Donation.event_id == event_id)
+        if status:
+            query = query.filter(Donation.status == status)
+        if date_from:
+            query = query.filter(Donation.created_at >= date_from)
+        if date_to:
+            query = query.filter(Donation.created_at <= date_to)
+        if min_amount is not None:
+            query = query.filter(Donation.amount >= min_amount)
+        if max_amount is not None:
+            query = query.filter(Donation.amount <= max_amount)
+        
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor, 2)
+            cursor_created_at = datetime.fromisoformat(cursor_created_at)
+            cursor_id = int(cursor_id)
+            query = query.filter(or_(
+                Donation.created_at < cursor_created_at,
+                and_(Donation.created_at == cursor_created_at, Donation.id < cursor_id)
+            ))
+        
+        # Pedimos una de más para saber si existe otra página
+        donations = query.order_by(Donation.created_at.desc(), Donation.id.desc()).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(donations) > limit:
+            donations = donations[:limit]
+            next_cursor = encode_cursor(donations[-1].created_at, donations[-1].id)
+        
+        return donations, next_cursor
     
     @staticmethod
     def get_donation_statistics(association_id: Optional[int] = None) -> dict:
-        """Obtener estadísticas de donaciones"""
-        
-        query = Donation.query.filter_by(status=DonationStatus.COMPLETED)
+        """Obtener estadísticas de donaciones (agregadas en SQL, sin cargar filas)"""
         
+        conditions = [Donation.status == DonationStatus.COMPLETED]
         if association_id:
-            query = query.filter_by(association_id=association_id)
-        
-        donations = query.order_by(Donation.created_at.desc()).all()
+            conditions.append(Donation.association_id == association_id)
         
-        total_amount = sum(d.amount for d in donations)
-        total_count = len(donations)
+        # Total, número de donaciones y fecha de la última en una sola consulta
+        total_amount, total_count, last_created_at = db.session.query(
+            func.coalesce(func.sum(Donation.amount), 0),
+            func.count(Donation.id),
+            func.max(Donation.created_at)
+        ).filter(*conditions).one()
         
-        # Obtener información de la última donación
-        last_donation = donations[0] if donations else None
+        # Obtener información de la última donación (la fila con la fecha máxima)
         last_donation_info = None
         
-        if last_donation:
+        if last_created_at is not None:
+            last_donation = (
+                db.session.query(
+                    Donation.amount,
+                    Donation.created_at,
+                    User.id.label('donor_id'),
+                    User.name.label('donor_name'),
+                    User.lastname.label('donor_lastname'),
+                    Association.name.label('donor_association_name')
+                )
+                .outerjoin(User, User.id == Donation.donor_id)
+                .outerjoin(Association, Association.user_id == User.id)
+                .filter(*conditions, Donation.created_at == last_created_at)
+                .order_by(Donation.id.desc())
+                .first()
+            )
+            
+            if last_donation.donor_id is None:
+                donor_name = 'Donante anónimo'
+            elif last_donation.donor_association_name:
+                donor_name = last_donation.donor_association_name
+            else:
+                donor_name = f"{last_donation.donor_name} {last_donation.donor_lastname}".strip()
+            
             last_donation_info = {
                 'amount': float(last_donation.amount),
                 'date': last_donation.created_at.isoformat() if last_donation.created_at else None,
-                'donor_name': (
-                    last_donation.donor.association.name if last_donation.donor.association 
-                    else f"{last_donation.donor.name} {last_donation.donor.lastname}".strip()
-                ) if last_donation.donor else 'Donante anónimo'
+                'donor_name': donor_name
             }
         
         return {
@@ -214,4 +250,4 @@ class DonationService:
             'total_count': total_count,
             'last_donation': last_donation_info,
             'currency': 'EUR'
-        } 
\ No newline at end of file
+        }
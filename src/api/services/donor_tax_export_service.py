@@ -0,0 +1,164 @@
+import csv
+import io
+from datetime import datetime
+from itertools import groupby
+from typing import Iterator
+from sqlalchemy import select, func, extract
+from ..models import Donation, User, Association, db
+from ..models.donation import DonationStatus
+
+# Formatos de salida admitidos
+TAX_EXPORT_FORMATS = ('csv', 'fixed')
+
+# Filas leídas por lote desde la base de datos
+TAX_EXPORT_BATCH_SIZE = 1000
+
+TAX_EXPORT_CSV_FIELDS = [
+    "fiscal_year", "association_cif", "donor_id", "donor_name", "donor_email",
+    "total_amount", "donation_count", "recurrent"
+]
+
+# Registro de ancho fijo (campo, ancho). Los importes van en céntimos con ceros
+# a la izquierda (11 enteros + 2 decimales) y los textos en mayúsculas, como
+# en los ficheros del Modelo 182. No es el registro oficial de la AEAT: no
+# guardamos NIF ni provincia de los donantes.
+TAX_EXPORT_FIXED_LAYOUT = (
+    ("fiscal_year", 4),
+    ("association_cif", 9),
+    ("donor_id", 10),
+    ("donor_name", 40),
+    ("donor_email", 60),
+    ("total_amount", 13),
+    ("donation_count", 5),
+    ("recurrent", 1),
+)
+
+
+def _fixed_width_line(row: dict) -> str:
+    parts = []
+    for field, width in TAX_EXPORT_FIXED_LAYOUT:
+        value = row[field]
+        if field == "total_amount":
+            parts.append(str(int(round(value * 100))).zfill(width)[-width:])
+        elif field in ("fiscal_year", "donor_id", "donation_count"):
+            parts.append(str(value).zfill(width)[-width:])
+        elif field == "recurrent":
+            # Clave de recurrencia del Modelo 182: 1 = sí, 2 = no
+            parts.append("1" if value else "2")
+        else:
+            parts.append(str(value or "").upper().ljust(width)[:width])
+    return "".join(parts) + "\r\n"
+
+
+class DonorTaxExportService:
+
+    @staticmethod
+    def iter_donor_totals(association: Association, fiscal_year: int) -> Iterator[dict]:
+        """Totales por donante de las donaciones completadas de un ejercicio.
+
+        La agregación por donante y año se hace en SQL y las filas se leen
+        en streaming ordenadas por donante, así la memoria no depende del
+        número de donantes. Se leen también los dos ejercicios anteriores para
+        calcular la recurrencia: donó en ambos y el importe nunca bajó.
+        """
+        completed_at = func.coalesce(Donation.completed_at, Donation.created_at)
+        year = extract('year', completed_at)
+
+        totals = (
+            select(
+                Donation.donor_id.label('donor_id'),
+                year.label('year'),
+                func.sum(Donation.amount).label('total_amount'),
+                func.count(Donation.id).label('donation_count')
+            )
+            .where(
+                Donation.association_id == association.id,
+                Donation.status == DonationStatus.COMPLETED,
+                # El Modelo 182 se declara en euros
+                Donation.currency == 'EUR',
+                completed_at >= datetime(fiscal_year - 2, 1, 1),
+                completed_at < datetime(fiscal_year + 1, 1, 1)
+            )
+            .group_by(Donation.donor_id, year)
+            .subquery()
+        )
+
+        stmt = (
+            select(
+                totals.c.donor_id,
+                totals.c.year,
+                totals.c.total_amount,
+                totals.c.donation_count,
+                User.name,
+                User.lastname,
+                User.email,
+                Association.name.label('donor_association_name')
+            )
+            .join(User, User.id == totals.c.donor_id)
+            .outerjoin(Association, Association.user_id == User.id)
+            .order_by(totals.c.donor_id, totals.c.year)
+            .execution_options(yield_per=TAX_EXPORT_BATCH_SIZE)
+        )
+
+        rows = db.session.execute(stmt)
+        for donor_id, donor_rows in groupby(rows, key=lambda row: row.donor_id):
+            amounts = {}
+            current = None
+            for row in donor_rows:
+                amounts[int(row.year)] = float(row.total_amount)
+                if int(row.year) == fiscal_year:
+                    current = row
+
+            # Solo se declaran donantes con donaciones en el ejercicio
+            if current is None:
+                continue
+
+            previous, before_previous = amounts.get(fiscal_year - 1), amounts.get(fiscal_year - 2)
+            recurrent = (
+                previous is not None and before_previous is not None
+                and before_previous <= previous <= amounts[fiscal_year]
+            )
+
+            if current.donor_association_name:
+                donor_name = current.donor_association_name
+            else:
+                donor_name = f"{current.lastname or ''} {current.name or ''}".strip()
+
+            yield {
+                "fiscal_year": fiscal_year,
+                "association_cif": association.cif,
+                "donor_id": donor_id,
+                "donor_name": donor_name,
+                "donor_email": current.email,
+                "total_amount": round(amounts[fiscal_year], 2),
+                "donation_count": current.donation_count,
+                "recurrent": recurrent
+            }
+
+    @staticmethod
+    def iter_export(association_id: int, fiscal_year: int, export_format: str = 'csv') -> Iterator[str]:
+        """Generar el fichero de exportación línea a línea (csv o fixed).
+        Lanza ValueError si la asociación no existe."""
+        # Comprobar antes de devolver el generador para no fallar a mitad de la respuesta
+        association = db.session.get(Association, association_id)
+        if not association:
+            raise ValueError(f"Asociación con id {association_id} no encontrada")
+
+        rows = DonorTaxExportService.iter_donor_totals(association, fiscal_year)
+
+        def generate_fixed():
+            for row in rows:
+                yield _fixed_width_line(row)
+
+        def generate_csv():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=TAX_EXPORT_CSV_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({**row, "recurrent": int(row["recurrent"])})
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+            yield buffer.getvalue()
+
+        return generate_fixed() if export_format == 'fixed' else generate_csv()
@@ -0,0 +1,92 @@
+import csv
+import io
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import insert
+from ..models import Event, db
+from ..schemas.event_schema import validate_event_data
+from ..cache import schedule_cache_bump
+
+# Columnas aceptadas en la importación (JSON o cabecera del CSV)
+EVENT_IMPORT_FIELDS = (
+    'title', 'description', 'image_url', 'date', 'city',
+    'address', 'event_type', 'max_volunteers'
+)
+
+# Máximo de filas por petición y filas por transacción
+MAX_IMPORT_ROWS = 10000
+IMPORT_CHUNK_SIZE = 1000
+
+
+class EventImportService:
+
+    @staticmethod
+    def parse_csv(content: str) -> List[dict]:
+        """Leer un CSV con cabecera y devolver una lista de filas como diccionarios"""
+        reader = csv.DictReader(io.StringIO(content))
+        return [
+            {field: row.get(field) for field in EVENT_IMPORT_FIELDS if field in row}
+            for row in reader
+        ]
+
+    @staticmethod
+    def _row_to_values(data: dict, association_id: int) -> dict:
+        """Convertir una fila ya validada en los valores de la tabla events"""
+        max_volunteers = data.get('max_volunteers')
+        if max_volunteers == "" or max_volunteers is None:
+            max_volunteers = None
+        else:
+            max_volunteers = int(max_volunteers)
+
+        return {
+            'title': data['title'],
+            'description': data.get('description'),
+            'image_url': data.get('image_url') or None,
+            'date': datetime.fromisoformat(data['date']),
+            'city': data['city'],
+            'address': data.get('address') or None,
+            'event_type': data['event_type'],
+            'association_id': association_id,
+            'max_volunteers': max_volunteers
+        }
+
+    @staticmethod
+    def validate_rows(rows: List[dict], association_id: int):
+        """Validar todas las filas en una sola pasada con las reglas de validate_event_data.
+
+        Devuelve (valores_validos, errores) donde cada error indica el índice de fila.
+        """
+        values = []
+        errors = []
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                errors.append({'row': index, 'details': {'row': 'Cada fila debe ser un objeto.'}})
+                continue
+            row_errors = validate_event_data(row)
+            if row_errors:
+                errors.append({'row': index, 'details': row_errors})
+                continue
+            values.append(EventImportService._row_to_values(row, association_id))
+        return values, errors
+
+    @staticmethod
+    def import_events(rows: List[dict], association_id: int,
+                      chunk_size: Optional[int] = None) -> dict:
+        """Validar e insertar eventos en bloque (executemany en transacciones por lotes)"""
+        chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+        values, errors = EventImportService.validate_rows(rows, association_id)
+
+        created = 0
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            db.session.execute(insert(Event), chunk)
+            # El insert de Core no pasa por el flush del ORM: invalidar la caché al hacer commit
+            schedule_cache_bump(db.session, ("events",))
+            db.session.commit()
+            created += len(chunk)
+
+        return {
+            'created': created,
+            'failed': len(errors),
+            'errors': errors
+        }
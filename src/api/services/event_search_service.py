@@ -0,0 +1,66 @@
+import re
+from sqlalchemy import Float, Integer, func, literal_column, or_, text
+from ..models import Event, db
+
+# Documento de búsqueda de un evento. Debe coincidir exactamente con la
+# expresión del índice GIN ix_events_search_document (migración 3d7a9c5e1f20)
+# para que PostgreSQL pueda usarlo.
+EVENT_SEARCH_DOCUMENT_SQL = (
+    "to_tsvector('spanish'::regconfig, "
+    "coalesce(events.title, '') || ' ' || coalesce(events.description, '') || ' ' || "
+    "coalesce(events.city, '') || ' ' || coalesce(events.event_type, ''))"
+)
+
+# Palabras de la búsqueda (letras y números, incluidos acentos)
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class EventSearchService:
+
+    @staticmethod
+    def _tokens(search_text: str) -> list:
+        """Separar el texto de búsqueda en palabras"""
+        return _TOKEN_PATTERN.findall(search_text.lower())
+
+    @staticmethod
+    def apply_search(query, search_text: str):
+        """Filtrar la consulta de eventos por texto y ordenarla por relevancia.
+
+        PostgreSQL usa tsvector + índice GIN, SQLite la tabla FTS5 events_fts y
+        cualquier otro motor cae en un ILIKE sobre los campos de texto.
+        """
+        tokens = EventSearchService._tokens(search_text)
+        if not tokens:
+            return query
+
+        dialect = db.engine.dialect.name
+
+        if dialect == 'postgresql':
+            document = literal_column(EVENT_SEARCH_DOCUMENT_SQL)
+            # Cada palabra como prefijo: "limp play" -> limp:* & play:*
+            ts_query = func.to_tsquery(
+                literal_column("'spanish'::regconfig"),
+                " & ".join(f"{token}:*" for token in tokens)
+            )
+            rank = func.ts_rank(document, ts_query)
+            return query.filter(document.op('@@')(ts_query)).order_by(rank.desc(), Event.id)
+
+        if dialect == 'sqlite':
+            # Cada palabra entre comillas (evita la sintaxis de FTS5) y como prefijo
+            match = " ".join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+            matches = text(
+                "SELECT rowid AS event_id, bm25(events_fts) AS rank "
+                "FROM events_fts WHERE events_fts MATCH :match"
+            ).bindparams(match=match).columns(event_id=Integer, rank=Float).subquery('event_matches')
+            # bm25 devuelve valores más bajos cuanto más relevante es el resultado
+            return query.join(matches, matches.c.event_id == Event.id).order_by(matches.c.rank, Event.id)
+
+        for token in tokens:
+            pattern = f"%{token}%"
+            query = query.filter(or_(
+                Event.title.ilike(pattern),
+                Event.description.ilike(pattern),
+                Event.city.ilike(pattern),
+                Event.event_type.ilike(pattern)
+            ))
+        return query.order_by(Event.date, Event.id)
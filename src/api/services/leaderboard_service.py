@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import select, insert, delete, func, literal, Float, DateTime
+from sqlalchemy.orm import joinedload
+from ..models import Association, AssociationLeaderboard, db
+from ..cache import schedule_cache_bump
+
+# Tamaño por defecto y máximo del ranking devuelto por la API
+DEFAULT_LEADERBOARD_SIZE = 20
+MAX_LEADERBOARD_SIZE = 100
+
+
+class LeaderboardService:
+
+    @staticmethod
+    def refresh(prior_weight: Optional[float] = None) -> int:
+        """Recalcular el ranking completo con una media bayesiana.
+
+        score = (C * m + suma) / (C + n), donde m es la media global de todas
+        las valoraciones y C el peso de esa media (por defecto, el número medio
+        de valoraciones por asociación valorada). Todo se calcula en SQL con un
+        único INSERT ... SELECT, sin traer las asociaciones a Python.
+        """
+        total_sum, total_count, rated_associations = db.session.query(
+            func.coalesce(func.sum(Association.rating_sum), 0),
+            func.coalesce(func.sum(Association.rating_count), 0),
+            func.count(Association.id)
+        ).filter(Association.rating_count > 0).one()
+
+        db.session.execute(delete(AssociationLeaderboard))
+
+        if total_count:
+            global_mean = float(total_sum) / total_count
+            if prior_weight is None:
+                prior_weight = total_count / rated_associations
+
+            prior = literal(prior_weight, Float)
+            scores = select(
+                Association.id.label('association_id'),
+                ((prior * global_mean + Association.rating_sum) / (prior + Association.rating_count)).label('score'),
+                (Association.rating_sum / Association.rating_count).label('average_rating'),
+                Association.rating_count.label('rating_count')
+            ).where(Association.rating_count > 0).subquery()
+
+            ranked = select(
+                scores.c.association_id,
+                func.row_number().over(order_by=(scores.c.score.desc(), scores.c.association_id)),
+                scores.c.score,
+                scores.c.average_rating,
+                scores.c.rating_count,
+                literal(datetime.now(timezone.utc), DateTime)
+            )
+
+            db.session.execute(
+                insert(AssociationLeaderboard).from_select(
+                    ['association_id', 'rank', 'score', 'average_rating', 'rating_count', 'computed_at'],
+                    ranked
+                )
+            )
+
+        # El insert de Core no pasa por el flush del ORM: invalidar la caché al hacer commit
+        schedule_cache_bump(db.session, ("leaderboard",))
+        db.session.commit()
+        return int(rated_associations)
+
+    @staticmethod
+    def get_top(limit: int = DEFAULT_LEADERBOARD_SIZE) -> List[AssociationLeaderboard]:
+        """Primeras posiciones del ranking con su asociación ya cargada"""
+        return AssociationLeaderboard.query.options(
+            joinedload(AssociationLeaderboard.association)
+        ).order_by(AssociationLeaderboard.rank).limit(limit).all()
@@ -1,38 +1,43 @@
 from typing import Optional, List
-from sqlalchemy import and_, func
-from datetime import datetime, timedelta
-from ..models import Rating, EventVolunteer, Event, db
+from sqlalchemy import and_, or_, func, exists, case, select, literal, Float, Text, DateTime
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timedelta, timezone
+from ..models import Rating, EventVolunteer, Event, Association, db
+from ..utils import encode_cursor, decode_cursor
+from ..cache import schedule_cache_bump
+
+# Tamaño de página por defecto y máximo del listado de valoraciones
+DEFAULT_RATINGS_PAGE_SIZE = 20
+MAX_RATINGS_PAGE_SIZE = 100
 
 
 class RatingService:
     
     @staticmethod
-    def can_user_rate_association(user_id: int, association_id: int) -> bool:
-        """Verificar si el usuario puede valorar la asociación (tiene eventos terminados donde fue voluntario)"""
-        # Buscar eventos terminados de la asociación donde el usuario fue voluntario
+    def _unrated_finished_events_query(user_id: int, association_id: int):
+        """Eventos terminados de la asociación donde el usuario fue voluntario y
+        que todavía no ha valorado (anti-join con NOT EXISTS, una sola consulta)"""
         # Usar hora de España (UTC+2) en lugar de UTC
         spain_now = datetime.now() + timedelta(hours=2)
-        finished_events = db.session.query(EventVolunteer).join(Event).filter(
+        already_rated = exists().where(
+            Rating.user_id == user_id,
+            Rating.event_id == Event.id
+        )
+        return Event.query.join(EventVolunteer).filter(
             and_(
                 EventVolunteer.volunteer_id == user_id,
                 Event.association_id == association_id,
-                Event.date < spain_now  # Evento ya terminó (hora España)
+                Event.date < spain_now,  # Evento ya terminó (hora España)
+                ~already_rated
             )
-        ).all()
-        
-        # Verificar si hay al menos un evento terminado sin valorar
-        for event_volunteer in finished_events:
-            event_id = event_volunteer.event_id
-            # Verificar si ya valoró este evento específico
-            existing_rating = Rating.query.filter_by(
-                user_id=user_id,
-                event_id=event_id
-            ).first()
-            
-            if not existing_rating:
-                return True  # Hay al menos un evento sin valorar
-        
-        return False
+        )
+    
+    @staticmethod
+    def can_user_rate_association(user_id: int, association_id: int) -> bool:
+        """Verificar si el usuario puede valorar la asociación (tiene algún evento terminado sin valorar)"""
+        unrated = RatingService._unrated_finished_events_query(user_id, association_id)
+        return db.session.query(unrated.exists()).scalar()
     
     @staticmethod
     def get_user_finished_events_for_association(user_id: int, association_id: int) -> List[Event]:
@@ -51,20 +56,10 @@ class RatingService:
     
     @staticmethod
     def get_unrated_events_for_user(user_id: int, association_id: int) -> List[Event]:
-        """Obtener eventos terminados que el usuario no ha valorado"""
-        finished_events = RatingService.get_user_finished_events_for_association(user_id, association_id)
-        unrated_events = []
-        
-        for event in finished_events:
-            existing_rating = Rating.query.filter_by(
-                user_id=user_id,
-                event_id=event.id
-            ).first()
-            
-            if not existing_rating:
-                unrated_events.append(event)
-        
-        return unrated_events
+        """Obtener eventos terminados que el usuario no ha valorado (con su asociación ya cargada)"""
+        return RatingService._unrated_finished_events_query(user_id, association_id).options(
+            *Event.summary_load_options()
+        ).order_by(Event.date.desc()).all()
     
     @staticmethod
     def user_already_rated_event(user_id: int, event_id: int) -> bool:
@@ -95,34 +90,148 @@ class RatingService:
         )
         
         db.session.add(new_rating)
+        RatingService._add_to_association_totals(association_id, rating, 1)
         if commit:
             db.session.commit()
         
         return new_rating
     
     @staticmethod
-    def get_association_ratings(association_id: int) -> List[Rating]:
-        """Obtener todas las valoraciones de una asociación"""
-        return Rating.query.filter_by(association_id=association_id).order_by(Rating.created_at.desc()).all()
+    def rate_event(
+        rating: float,
+        user_id: int,
+        association_id: int,
+        event_id: int,
+        comment: Optional[str] = None
+    ) -> Optional[Rating]:
+        """Valorar un evento si el usuario fue voluntario, ya terminó y no lo había valorado.
+        
+        Comprobación e inserción van en una sola sentencia
+        INSERT ... SELECT ... ON CONFLICT (user_id, event_id) DO NOTHING, así
+        dos envíos simultáneos no pueden crear dos valoraciones. Devuelve None
+        si no se insertó nada.
+        """
+        dialect = db.engine.dialect.name
+        if dialect not in ('postgresql', 'sqlite'):
+            if not RatingService.can_user_rate_event(user_id, event_id):
+                return None
+            return RatingService.create_rating(rating, user_id, association_id, event_id, comment)
+        
+        # Usar hora de España (UTC+2) en lugar de UTC
+        spain_now = datetime.now() + timedelta(hours=2)
+        now = datetime.now(timezone.utc)
+        eligible = select(
+            literal(rating, Float),
+            literal(comment, Text),
+            EventVolunteer.volunteer_id,
+            Event.association_id,
+            Event.id,
+            literal(now, DateTime),
+            literal(now, DateTime)
+        ).join(EventVolunteer, EventVolunteer.event_id == Event.id).where(
+            Event.id == event_id,
+            Event.association_id == association_id,
+            EventVolunteer.volunteer_id == user_id,
+            Event.date < spain_now  # Evento ya terminó (hora España)
+        )
+        
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = dialect_insert(Rating).from_select(
+            ['rating', 'comment', 'user_id', 'association_id', 'event_id', 'created_at', 'updated_at'],
+            eligible
+        ).on_conflict_do_nothing(index_elements=['user_id', 'event_id']).returning(Rating.id)
+        
+        rating_id = db.session.execute(stmt).scalar()
+        if rating_id is None:
+            db.session.rollback()
+            return None
+        
+        RatingService._add_to_association_totals(association_id, rating, 1)
+        # Los inserts de Core no pasan por el flush del ORM: invalidar la caché al hacer commit
+        schedule_cache_bump(db.session, ("ratings", "associations"))
+        db.session.commit()
+        
+        return Rating.query.options(
+            joinedload(Rating.user),
+            joinedload(Rating.association),
+            joinedload(Rating.event)
+        ).filter_by(id=rating_id).one()
     
     @staticmethod
-    def get_rating_summary(association_id: int) -> dict:
-        """Obtener resumen de valoraciones (promedio y total)"""
-        ratings = Rating.query.filter_by(association_id=association_id).all()
+    def get_association_ratings(association_id: int, cursor: Optional[str] = None,
+                                limit: int = DEFAULT_RATINGS_PAGE_SIZE):
+        """Obtener una página de valoraciones de una asociación, de la más reciente a la más antigua.
+        
+        Pagina por cursor sobre (created_at, id) y carga usuario, asociación y
+        evento en la misma consulta. Devuelve (valoraciones, next_cursor).
+        Lanza ValueError si el cursor no es válido.
+        """
+        query = Rating.query.options(
+            joinedload(Rating.user),
+            joinedload(Rating.association),
+            joinedload(Rating.event)
+        ).filter(Rating.association_id == association_id)
+        
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor, 2)
+            cursor_created_at = datetime.fromisoformat(cursor_created_at)
+            cursor_id = int(cursor_id)
+            query = query.filter(or_(
+                Rating.created_at < cursor_created_at,
+                and_(Rating.created_at == cursor_created_at, Rating.id < cursor_id)
+            ))
         
-        if not ratings:
+        # Pedimos una de más para saber si existe otra página
+        ratings = query.order_by(Rating.created_at.desc(), Rating.id.desc()).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(ratings) > limit:
+            ratings = ratings[:limit]
+            next_cursor = encode_cursor(ratings[-1].created_at, ratings[-1].id)
+        
+        return ratings, next_cursor
+    
+    @staticmethod
+    def get_rating_histogram(association_id: int) -> dict:
+        """Número de valoraciones por estrella (1 a 5) con un solo GROUP BY"""
+        # Redondeo a la estrella más cercana (x.5 hacia arriba) igual en SQLite y PostgreSQL
+        stars = case(
+            (Rating.rating < 1.5, 1),
+            (Rating.rating < 2.5, 2),
+            (Rating.rating < 3.5, 3),
+            (Rating.rating < 4.5, 4),
+            else_=5
+        )
+        rows = db.session.query(stars, func.count(Rating.id)).filter(
+            Rating.association_id == association_id
+        ).group_by(stars).all()
+        
+        histogram = {star: 0 for star in range(1, 6)}
+        histogram.update({int(star): count for star, count in rows})
+        return histogram
+    
+    @staticmethod
+    def get_rating_summary(association_id: int) -> dict:
+        """Obtener resumen de valoraciones (promedio y total) desde los contadores de la asociación"""
+        association = db.session.get(Association, association_id)
+        if not association:
             return {
                 "average_rating": 0.0,
                 "total_ratings": 0
             }
         
-        total_rating = sum(r.rating for r in ratings)
-        average_rating = total_rating / len(ratings)
-        
-        return {
-            "average_rating": round(average_rating, 1),
-            "total_ratings": len(ratings)
-        }
+        return association.rating_summary()
+    
+    @staticmethod
+    def _add_to_association_totals(association_id: int, rating_delta: float, count_delta: int) -> None:
+        """Actualizar suma y número de valoraciones en la misma transacción (UPDATE atómico)"""
+        Association.query.filter_by(id=association_id).update(
+            {
+                Association.rating_sum: Association.rating_sum + rating_delta,
+                Association.rating_count: Association.rating_count + count_delta
+            },
+            synchronize_session=False
+        )
     
     @staticmethod
     def get_user_rating_for_event(user_id: int, event_id: int) -> Optional[Rating]:
@@ -139,12 +248,20 @@ class RatingService:
         comment: Optional[str] = None,
         commit: bool = True
     ) -> Optional[Rating]:
-        """Actualizar valoración existente"""
-        existing_rating = Rating.query.get(rating_id)
+        """Actualizar valoración existente.
+        
+        La fila se lee con FOR UPDATE (y refrescando la copia de la sesión): dos
+        ediciones simultáneas calculan la diferencia sobre el valor ya guardado
+        por la otra y la suma de la asociación no se desvía.
+        """
+        existing_rating = Rating.query.filter_by(id=rating_id).populate_existing().with_for_update().first()
         
         if not existing_rating:
             return None
         
+        RatingService._add_to_association_totals(
+            existing_rating.association_id, rating - existing_rating.rating, 0
+        )
         existing_rating.rating = rating
         if comment is not None:
             existing_rating.comment = comment
@@ -0,0 +1,175 @@
+from ..models import Donation, StripeWebhookEvent, db
+from ..models.donation import DonationStatus
+from ..models.stripe_webhook_event import WebhookEventStatus
+from .donation_service import DonationService
+from typing import List, Optional
+from sqlalchemy import select, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import os
+import stripe
+
+# Eventos leídos de la bandeja por transacción
+WEBHOOK_BATCH_SIZE = 100
+# Intentos antes de dar un evento por fallido
+MAX_WEBHOOK_ATTEMPTS = 5
+# Espera antes de cada reintento: se duplica en cada fallo (10 s, 20 s, 40 s...) hasta el máximo
+WEBHOOK_RETRY_BASE_SECONDS = 10
+WEBHOOK_RETRY_MAX_SECONDS = 15 * 60
+
+logger = logging.getLogger(__name__)
+
+
+class StripeWebhookService:
+
+    @staticmethod
+    def receive_webhook(payload: bytes, signature: str) -> Optional[dict]:
+        """Verificar la firma y guardar el evento en la bandeja (sin procesarlo).
+
+        Devuelve None si no hay secreto configurado. Si Stripe reenvía un evento
+        ya guardado no se inserta de nuevo e inbox_id es None.
+        """
+        webhook_secret = os.getenv('STRIPE_WEBHOOK_SECRET')
+
+        if not webhook_secret:
+            logger.warning("STRIPE_WEBHOOK_SECRET no configurado")
+            return None
+
+        try:
+            # Verificar la signature del webhook
+            event = stripe.Webhook.construct_event(payload, signature, webhook_secret)
+        except ValueError as e:
+            return {'status': 'error', 'message': f'Payload inválido: {e}'}
+        except stripe.error.SignatureVerificationError as e:
+            return {'status': 'error', 'message': f'Signature inválida: {e}'}
+
+        inbox_id = StripeWebhookService.store_event(event['id'], event['type'], payload.decode('utf-8'))
+        db.session.commit()
+
+        return {'status': 'received', 'event_id': event['id'], 'inbox_id': inbox_id}
+
+    @staticmethod
+    def store_event(stripe_event_id: str, event_type: str, payload: str) -> Optional[int]:
+        """Insertar el evento si no existe (sin commit). Devuelve el id nuevo o None si ya estaba"""
+        values = {
+            'stripe_event_id': stripe_event_id,
+            'event_type': event_type,
+            'payload': payload,
+            'status': WebhookEventStatus.PENDING,
+            'attempts': 0,
+            'received_at': datetime.now(timezone.utc)
+        }
+
+        dialect = db.engine.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            # Un reintento concurrente de Stripe no puede duplicar la fila
+            dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            stmt = dialect_insert(StripeWebhookEvent.__table__).values(**values)
+            stmt = stmt.on_conflict_do_nothing(index_elements=['stripe_event_id'])
+            return db.session.execute(stmt.returning(StripeWebhookEvent.id)).scalar()
+
+        if StripeWebhookEvent.query.filter_by(stripe_event_id=stripe_event_id).first():
+            return None
+        inbox_event = StripeWebhookEvent(**values)
+        db.session.add(inbox_event)
+        db.session.flush()
+        return inbox_event.id
+
+    @staticmethod
+    def retry_delay(attempts: int) -> timedelta:
+        """Espera antes del siguiente intento tras `attempts` intentos fallidos"""
+        seconds = WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+        return timedelta(seconds=min(seconds, WEBHOOK_RETRY_MAX_SECONDS))
+
+    @staticmethod
+    def process_pending(batch_size: int = WEBHOOK_BATCH_SIZE) -> dict:
+        """Procesar un lote de eventos pendientes en orden de llegada.
+
+        Solo se leen los que no tienen un reintento programado para más tarde.
+        En PostgreSQL las filas se bloquean con SKIP LOCKED, así que varios
+        procesos pueden vaciar la bandeja a la vez sin repetir eventos.
+        """
+        now = datetime.now(timezone.utc)
+        rows = db.session.scalars(
+            select(StripeWebhookEvent)
+            .where(StripeWebhookEvent.status == WebhookEventStatus.PENDING,
+                   or_(StripeWebhookEvent.next_attempt_at.is_(None),
+                       StripeWebhookEvent.next_attempt_at <= now))
+            .order_by(StripeWebhookEvent.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        return StripeWebhookService._process_rows(rows)
+
+    @staticmethod
+    def process_event(inbox_id: int) -> dict:
+        """Procesar un único evento de la bandeja si sigue pendiente"""
+        rows = db.session.scalars(
+            select(StripeWebhookEvent)
+            .where(StripeWebhookEvent.id == inbox_id,
+                   StripeWebhookEvent.status == WebhookEventStatus.PENDING)
+            .with_for_update(skip_locked=True)
+        ).all()
+        return StripeWebhookService._process_rows(rows)
+
+    @staticmethod
+    def _process_rows(rows: List[StripeWebhookEvent]) -> dict:
+        """Aplicar cada evento en su propio savepoint y hacer un solo commit por lote"""
+        result = {'processed': 0, 'retry': 0, 'failed': 0}
+
+        for inbox_event in rows:
+            inbox_event.attempts += 1
+            try:
+                with db.session.begin_nested():
+                    StripeWebhookService._handle_event(json.loads(inbox_event.payload))
+            except Exception as e:
+                logger.warning("Webhook %s (%s) falló: %s",
+                               inbox_event.stripe_event_id, inbox_event.event_type, e)
+                inbox_event.last_error = str(e)
+                if inbox_event.attempts >= MAX_WEBHOOK_ATTEMPTS:
+                    inbox_event.status = WebhookEventStatus.FAILED
+                    inbox_event.next_attempt_at = None
+                    result['failed'] += 1
+                else:
+                    inbox_event.next_attempt_at = (
+                        datetime.now(timezone.utc) + StripeWebhookService.retry_delay(inbox_event.attempts)
+                    )
+                    result['retry'] += 1
+                continue
+
+            inbox_event.status = WebhookEventStatus.PROCESSED
+            inbox_event.processed_at = datetime.now(timezone.utc)
+            inbox_event.last_error = None
+            inbox_event.next_attempt_at = None
+            result['processed'] += 1
+
+        db.session.commit()
+        return result
+
+    @staticmethod
+    def _handle_event(event: dict) -> None:
+        """Aplicar un evento de Stripe a las donaciones (sin commit)"""
+        event_type = event['type']
+        stripe_object = event['data']['object']
+
+        # Pago completado
+        if event_type == 'checkout.session.completed':
+            donation = Donation.query.filter_by(stripe_session_id=stripe_object['id']).first()
+            if not donation:
+                # Puede llegar antes de que se guarde stripe_session_id: se reintenta
+                raise LookupError(f"Donación no encontrada para la sesión {stripe_object['id']}")
+            DonationService.mark_donation_completed(donation)
+
+        # Pago fallido: la donación se identifica por los metadatos del PaymentIntent
+        elif event_type == 'payment_intent.payment_failed':
+            donation_id = (stripe_object.get('metadata') or {}).get('donation_id')
+            if not donation_id:
+                logger.info("Pago fallido sin donation_id: %s", stripe_object['id'])
+                return
+            donation = db.session.get(Donation, int(donation_id))
+            if not donation:
+                raise LookupError(f"Donación con id {donation_id} no encontrada")
+            if donation.status == DonationStatus.PENDING:
+                donation.status = DonationStatus.FAILED
@@ -1,4 +1,7 @@
 from flask import jsonify, url_for
+from datetime import datetime
+import base64
+import json
 
 class APIException(Exception):
     status_code = 400
@@ -15,6 +18,23 @@ class APIException(Exception):
         rv['message'] = self.message
         return rv
 
+def encode_cursor(*values):
+    """Codificar la posición de una página (p. ej. fecha e id) en un cursor opaco"""
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    payload = json.dumps(raw, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor, size):
+    """Decodificar un cursor generado por encode_cursor. Lanza ValueError si no es válido"""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Cursor inválido")
+    return values
+
 def has_no_empty_params(rule):
     defaults = rule.defaults if rule.defaults is not None else ()
     arguments = rule.arguments if rule.arguments is not None else ()
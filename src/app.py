@@ -3,6 +3,7 @@ This module takes care of starting the API Server, Loading the DB and Adding the
 """
 from api.commands import setup_commands
 from api.admin import setup_admin
+from api.cache import setup_response_cache
 from api.routes import api
 from api.models import db
 from api.utils import APIException, generate_sitemap
@@ -48,6 +49,13 @@ app.config['JWT_SECRET_KEY'] = os.getenv(
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=2)
 app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=7)
 
+# Almacén de imágenes (ver api/assets.py). ASSET_BASE_URL es el host público del
+# backend; si está vacío las URLs quedan relativas (/api/assets/...)
+app.config['ASSET_STORE_DIR'] = os.getenv(
+    'ASSET_STORE_DIR', os.path.join(app.instance_path, 'assets'))
+app.config['ASSET_BASE_URL'] = os.getenv(
+    'ASSET_BASE_URL', os.getenv('VITE_BACKEND_URL', ''))
+
 # Initialize JWT Manager
 jwt = JWTManager(app)
 
@@ -84,6 +92,8 @@ if ENV == "production":
 setup_admin(app)
 # add the admin
 setup_commands(app)
+# ETag + LRU cache for public read endpoints
+setup_response_cache(app)
 
 
 # Add all endpoints form the API with a "api" prefix
@@ -44,11 +44,11 @@ export const EventDetail = () => {
             setEvent(eventData);
 
             // Verificar si el usuario actual está registrado
-            if (store.user && eventData.volunteers) {
-                const isUserRegistered = eventData.volunteers.some(
-                    (volunteer) => volunteer.id === store.user.id
-                );
-                setUserIsRegistered(isUserRegistered);
+            // (el detalle solo trae los primeros voluntarios, se consulta el listado completo)
+            if (store.user) {
+                const rosterRes = await fetch(`${API_BASE_URL}/api/events/${id}/volunteers?volunteer_id=${store.user.id}`);
+                const rosterData = rosterRes.ok ? await rosterRes.json() : { volunteers: [] };
+                setUserIsRegistered(rosterData.volunteers.length > 0);
             } else {
                 setUserIsRegistered(false);
             }
@@ -72,7 +72,7 @@ export const EventDetail = () => {
 
         // Verificar si el evento está lleno
         const maxVolunteers = event.max_volunteers;
-        const currentVolunteers = event.volunteers?.length || 0;
+        const currentVolunteers = parseInt(event.Volunteers_count) || 0;
 
         if (maxVolunteers && currentVolunteers >= maxVolunteers) {
             showWarning('Evento lleno', 'Este evento ya está lleno.');
@@ -0,0 +1,92 @@
+"""
+Configuración común de los tests.
+
+Por defecto se usa un SQLite temporal. Para los tests de concurrencia hace
+falta PostgreSQL (SQLite serializa las escrituras y no reproduce los
+bloqueos): exportar TEST_DATABASE_URL=postgresql://... antes de lanzar pytest.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+_tmp_dir = tempfile.mkdtemp(prefix="tests-")
+
+# La app lee la configuración al importarse: fijarla antes del import
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", f"sqlite:///{_tmp_dir}/test.db")
+# Modo desarrollo: evita que la app lance las migraciones al importarse
+os.environ["FLASK_DEBUG"] = "1"
+os.environ["ASSET_STORE_DIR"] = os.path.join(_tmp_dir, "assets")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from app import app as flask_app  # noqa: E402
+from api.models import db, User, Association  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        if db.engine.dialect.name == "postgresql":
+            with db.engine.begin() as connection:
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def association(app):
+    owner = User(email="asociacion@example.com", password="x", name="Asociación")
+    db.session.add(owner)
+    db.session.flush()
+    association = Association(name="Asociación", cif="G12345678", description="Descripción",
+                              contact_email=owner.email, user_id=owner.id)
+    db.session.add(association)
+    db.session.commit()
+    return association
+
+
+@pytest.fixture
+def make_volunteers(app):
+    def make(count):
+        volunteers = [User(email=f"voluntario{i}@example.com", password="x", name=f"Voluntario {i}")
+                      for i in range(count)]
+        db.session.add_all(volunteers)
+        db.session.commit()
+        return volunteers
+    return make
+
+
+@pytest.fixture
+def volunteer_headers(app):
+    """Cabecera Authorization con los claims que emite el login de un voluntario"""
+    def headers(user):
+        token = create_access_token(
+            identity=str(user.id),
+            additional_claims={"role": "volunteer", "email": user.email, "name": user.name}
+        )
+        return {"Authorization": f"Bearer {token}"}
+    return headers
+
+
+@pytest.fixture
+def association_headers(app):
+    """Cabecera Authorization con los claims que emite el login de una asociación"""
+    def headers(association, include_association=True):
+        claims = {"role": "association", "email": association.contact_email, "name": association.name}
+        if include_association:
+            claims["association"] = {"id": association.id, "name": association.name}
+        token = create_access_token(identity=str(association.user_id), additional_claims=claims)
+        return {"Authorization": f"Bearer {token}"}
+    return headers
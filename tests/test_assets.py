@@ -0,0 +1,80 @@
+"""
+Almacén de imágenes (user-025): validación al guardar y miniaturas bajo demanda.
+"""
+import hashlib
+import io
+import os
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from api.assets import store_image, get_asset_path, THUMBNAIL_SIZE
+
+
+def _png(width=600, height=400, mode="RGB"):
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _chunk(kind, payload):
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+
+def _png_with_corrupt_pixels():
+    """PNG con cabecera y CRC correctos (pasa verify()) pero un IDAT que no se puede descomprimir"""
+    header = struct.pack(">IIBBBBB", 64, 64, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", header)
+            + _chunk(b"IDAT", b"esto no es zlib" * 4) + _chunk(b"IEND", b""))
+
+
+def _stored_files(app):
+    store_dir = app.config["ASSET_STORE_DIR"]
+    return {name for _, _, files in os.walk(store_dir) for name in files}
+
+
+def test_store_image_writes_original_and_thumbnail(app, client):
+    filename = store_image(_png())
+    digest = filename.split(".")[0]
+
+    response = client.get(f"/api/assets/{digest}_{THUMBNAIL_SIZE}.png")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["Cache-Control"]
+    width, height = Image.open(io.BytesIO(response.data)).size
+    assert width == THUMBNAIL_SIZE and height < THUMBNAIL_SIZE
+
+
+def test_store_image_rejects_too_many_pixels_before_decoding(app):
+    app.config["ASSET_MAX_PIXELS"] = 100 * 100
+    try:
+        with pytest.raises(ValueError, match="píxeles"):
+            store_image(_png(101, 100))
+    finally:
+        app.config.pop("ASSET_MAX_PIXELS")
+
+
+def test_store_image_rejects_undecodable_image_without_writing(app):
+    before = _stored_files(app)
+    with pytest.raises(ValueError, match="La imagen no es válida"):
+        store_image(_png_with_corrupt_pixels())
+    assert _stored_files(app) == before
+
+
+def test_store_image_thumbnails_palette_png(app):
+    # Imagen con paleta (modo P): la miniatura se guarda en el mismo formato sin errores
+    assert store_image(_png(300, 300, mode="P")).endswith(".png")
+
+
+def test_missing_thumbnail_of_undecodable_original_serves_original(app, client):
+    # Un original que llegó al almacén sin validar (p. ej. por la migración de datos)
+    data = _png_with_corrupt_pixels()
+    digest = hashlib.sha256(data).hexdigest()
+    original_path = os.path.join(app.config["ASSET_STORE_DIR"], digest[:2], f"{digest}.png")
+    os.makedirs(os.path.dirname(original_path), exist_ok=True)
+    with open(original_path, "wb") as f:
+        f.write(data)
+
+    assert get_asset_path(f"{digest}_{THUMBNAIL_SIZE}.png") == original_path
+    assert client.get(f"/api/assets/{digest}_{THUMBNAIL_SIZE}.png").status_code == 200
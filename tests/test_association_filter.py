@@ -0,0 +1,63 @@
+"""
+Filtro de asociaciones (POST /api/associations/filter): orden, sentido y cursor (user-024).
+"""
+import pytest
+
+from api.models import db, User, Association
+
+NAMES = ["Abrazo", "Brote", "Cauce", "Dunas", "Encina"]
+
+
+@pytest.fixture
+def associations(app):
+    for i, name in enumerate(NAMES):
+        owner = User(email=f"owner{i}@example.com", password="x", name=name)
+        db.session.add(owner)
+        db.session.flush()
+        db.session.add(Association(name=name, cif=f"G0000000{i}", description="Descripción",
+                                   contact_email=owner.email, user_id=owner.id))
+    db.session.commit()
+
+
+def _filter(client, **filter_data):
+    return client.post("/api/associations/filter", json=filter_data)
+
+
+def _walk(client, **filter_data):
+    """Nombres de todas las páginas siguiendo next_cursor"""
+    names, cursor = [], None
+    while True:
+        data = dict(filter_data, limit=2)
+        if cursor:
+            data["cursor"] = cursor
+        response = _filter(client, **data)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        names.extend(association["name"] for association in body["associations"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return names
+
+
+@pytest.mark.parametrize("reverse, expected", [
+    (False, NAMES), ("false", NAMES), ("0", NAMES),
+    (True, NAMES[::-1]), ("true", NAMES[::-1]), ("1", NAMES[::-1]), (1, NAMES[::-1]),
+])
+def test_reverse_is_parsed_explicitly(client, associations, reverse, expected):
+    assert _walk(client, sort="name", reverse=reverse) == expected
+
+
+def test_cursor_from_other_direction_is_rejected(client, associations):
+    cursor = _filter(client, sort="name", reverse=True, limit=2).get_json()["next_cursor"]
+
+    response = _filter(client, sort="name", reverse=False, limit=2, cursor=cursor)
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Cursor de paginación inválido"
+
+
+def test_cursor_from_other_sort_is_rejected(client, associations):
+    cursor = _filter(client, sort="name", limit=2).get_json()["next_cursor"]
+
+    response = _filter(client, sort="id", limit=2, cursor=cursor)
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Cursor de paginación inválido"
@@ -0,0 +1,47 @@
+"""
+GET /api/ratings/can-rate/<association_id> con el anti-join de eventos sin valorar (user-019).
+"""
+from datetime import datetime, timedelta
+
+from api.models import db, Event, EventVolunteer, Rating
+
+
+def _event(association, title, days_from_now):
+    event = Event(title=title, description="Descripción", city="Málaga", event_type="social",
+                  date=datetime.now() + timedelta(days=days_from_now), association_id=association.id)
+    db.session.add(event)
+    db.session.flush()
+    return event
+
+
+def test_only_finished_unrated_events_of_the_volunteer_are_listed(client, association, make_volunteers,
+                                                                  volunteer_headers):
+    volunteer = make_volunteers(1)[0]
+    older = _event(association, "Terminado hace una semana", -7)
+    recent = _event(association, "Terminado hace dos días", -2)
+    rated = _event(association, "Terminado y valorado", -3)
+    upcoming = _event(association, "Próximo", 5)
+    _event(association, "Terminado sin el voluntario", -4)
+    for event in (older, recent, rated, upcoming):
+        db.session.add(EventVolunteer(event_id=event.id, volunteer_id=volunteer.id))
+    db.session.add(Rating(rating=5, user_id=volunteer.id, association_id=association.id, event_id=rated.id))
+    db.session.commit()
+
+    response = client.get(f"/api/ratings/can-rate/{association.id}", headers=volunteer_headers(volunteer))
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["can_rate"] is True
+    assert [event["title"] for event in body["unrated_events"]] == [recent.title, older.title]
+
+
+def test_cannot_rate_once_every_event_is_rated(client, association, make_volunteers, volunteer_headers):
+    volunteer = make_volunteers(1)[0]
+    event = _event(association, "Terminado", -1)
+    db.session.add(EventVolunteer(event_id=event.id, volunteer_id=volunteer.id))
+    db.session.add(Rating(rating=4, user_id=volunteer.id, association_id=association.id, event_id=event.id))
+    db.session.commit()
+
+    body = client.get(f"/api/ratings/can-rate/{association.id}", headers=volunteer_headers(volunteer)).get_json()
+    assert body["can_rate"] is False
+    assert body["already_rated"] is True
+    assert body["unrated_events"] == []
@@ -0,0 +1,31 @@
+"""
+Comandos de mantenimiento (flask reconcile-*).
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from api.cache import get_cache_versions
+from api.models import db, Event, EventVolunteer
+
+
+def test_reconcile_volunteer_counts_fixes_counter_and_invalidates_events(app, association, make_volunteers):
+    event = Event(title="Huerto urbano", description="Descripción", city="Granada", event_type="medioambiente",
+                  date=datetime.now() + timedelta(days=5), association_id=association.id)
+    db.session.add(event)
+    db.session.flush()
+    db.session.add_all([EventVolunteer(event_id=event.id, volunteer_id=volunteer.id)
+                        for volunteer in make_volunteers(2)])
+    db.session.commit()
+    # Contador desincronizado escrito por fuera del ORM (sin invalidar la caché)
+    db.session.execute(update(Event).where(Event.id == event.id).values(volunteers_count=7))
+    db.session.commit()
+    (events_version,) = get_cache_versions(("events",))
+
+    result = app.test_cli_runner().invoke(args=["reconcile-volunteer-counts"])
+    assert result.exit_code == 0, result.output
+    assert "Eventos corregidos: 1" in result.output
+
+    db.session.expire_all()
+    assert db.session.get(Event, event.id).volunteers_count == 2
+    assert get_cache_versions(("events",))[0] > events_version
@@ -0,0 +1,45 @@
+"""
+Estadísticas de donaciones agregadas en SQL (GET /api/donations/statistics, user-011).
+"""
+from datetime import datetime
+
+from api.cache import response_lru
+from api.models import db, Donation
+from api.models.donation import DonationStatus
+
+
+def _donation(amount, donor, association, created_at, status=DonationStatus.COMPLETED):
+    donation = Donation(amount, donor.id, association.id)
+    donation.status = status
+    donation.created_at = created_at
+    db.session.add(donation)
+
+
+def _statistics(client, **params):
+    response_lru.clear()
+    response = client.get("/api/donations/statistics", query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_statistics_only_count_completed_donations(client, association, make_volunteers):
+    first, last = make_volunteers(2)
+    last.lastname = "Pérez"
+    _donation(10, first, association, datetime(2026, 3, 1))
+    _donation(15.5, last, association, datetime(2026, 3, 2))
+    _donation(100, first, association, datetime(2026, 3, 3), status=DonationStatus.PENDING)
+    db.session.commit()
+
+    stats = _statistics(client, association_id=association.id)
+    assert stats["total_amount"] == 25.5
+    assert stats["total_count"] == 2
+    assert stats["last_donation"] == {
+        "amount": 15.5, "date": "2026-03-02T00:00:00", "donor_name": f"{last.name} Pérez"
+    }
+
+
+def test_statistics_without_donations(client, association):
+    stats = _statistics(client, association_id=association.id)
+    assert stats["total_amount"] == 0
+    assert stats["total_count"] == 0
+    assert stats["last_donation"] is None
@@ -0,0 +1,24 @@
+"""
+Permisos de GET /api/donations/tax-export (user-016).
+"""
+
+
+def test_tax_export_for_association(client, association, association_headers):
+    response = client.get("/api/donations/tax-export?year=2025", headers=association_headers(association))
+    assert response.status_code == 200
+    assert response.headers["Content-Disposition"] == "attachment; filename=modelo182_2025.csv"
+
+
+def test_tax_export_rejects_volunteers(client, make_volunteers, volunteer_headers):
+    response = client.get("/api/donations/tax-export", headers=volunteer_headers(make_volunteers(1)[0]))
+    assert response.status_code == 403
+    assert response.get_json()["success"] is False
+
+
+def test_tax_export_without_association_claim(client, association, association_headers):
+    response = client.get("/api/donations/tax-export",
+                          headers=association_headers(association, include_association=False))
+    assert response.status_code == 401
+    assert response.get_json() == {
+        "success": False, "message": "Error de autenticación: Datos de asociación no encontrados."
+    }
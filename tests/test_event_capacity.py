@@ -0,0 +1,123 @@
+"""
+Reserva de plazas con POST /api/volunteers/<id>/join bajo concurrencia.
+
+Solo tiene sentido contra PostgreSQL: en SQLite las escrituras se serializan
+y ni la sobreventa ni los interbloqueos pueden aparecer.
+"""
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from api.models import db, Event, EventVolunteer
+
+
+@pytest.fixture(autouse=True)
+def require_postgresql(app):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("Necesita TEST_DATABASE_URL apuntando a PostgreSQL")
+
+
+def _create_event(association, max_volunteers):
+    event = Event(title="Limpieza de playa", description="Descripción", city="Cádiz", event_type="medioambiente",
+                  date=datetime.now() + timedelta(days=7), association_id=association.id,
+                  max_volunteers=max_volunteers)
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def _run_concurrently(client, requests):
+    """Lanzar todas las peticiones (método, url, cabeceras) a la vez y devolver los códigos"""
+    barrier = threading.Barrier(len(requests))
+    status_codes = [None] * len(requests)
+
+    def send(index, method, url, headers):
+        barrier.wait()
+        status_codes[index] = client.open(url, method=method, headers=headers).status_code
+
+    threads = [threading.Thread(target=send, args=(i, *request)) for i, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counter(status_codes)
+
+
+# Presupuesto del p99 de un join con 10 peticiones simultáneas sobre el mismo evento
+JOIN_P99_BUDGET_SECONDS = 0.5
+
+
+def _stored_counts(event_id):
+    db.session.expire_all()
+    volunteers_count = db.session.get(Event, event_id).volunteers_count
+    rows = db.session.query(func.count()).select_from(EventVolunteer).filter_by(event_id=event_id).scalar()
+    return volunteers_count, rows
+
+
+def test_concurrent_joins_never_exceed_capacity(client, association, make_volunteers, volunteer_headers):
+    event_id = _create_event(association, max_volunteers=5)
+    volunteers = make_volunteers(20)
+
+    status_codes = _run_concurrently(client, [
+        ("POST", f"/api/volunteers/{event_id}/join", volunteer_headers(volunteer)) for volunteer in volunteers
+    ])
+
+    assert status_codes == Counter({201: 5, 400: 15})
+    assert _stored_counts(event_id) == (5, 5)
+
+
+def test_concurrent_join_and_leave_keep_count_consistent(client, association, make_volunteers, volunteer_headers):
+    event_id = _create_event(association, max_volunteers=10)
+    volunteers = make_volunteers(20)
+    joined, joining = volunteers[:10], volunteers[10:]
+    for volunteer in joined:
+        assert client.post(f"/api/volunteers/{event_id}/join", headers=volunteer_headers(volunteer)).status_code == 201
+
+    # Los leave liberan plazas mientras los join intentan ocuparlas: no debe haber
+    # interbloqueos (500) y el contador debe coincidir con las filas
+    requests = []
+    for leaving, new in zip(joined, joining):
+        requests.append(("DELETE", f"/api/volunteers/{event_id}/leave", volunteer_headers(leaving)))
+        requests.append(("POST", f"/api/volunteers/{event_id}/join", volunteer_headers(new)))
+    status_codes = _run_concurrently(client, requests)
+
+    assert status_codes[500] == 0
+    assert status_codes[200] == 10
+    volunteers_count, rows = _stored_counts(event_id)
+    assert volunteers_count == rows == status_codes[201]
+    assert rows <= 10
+
+
+def test_join_p99_latency_under_contention(client, association, make_volunteers, volunteer_headers):
+    # Todas las peticiones actualizan la misma fila de events: miden la espera por su bloqueo
+    event_id = _create_event(association, max_volunteers=None)
+    volunteers = make_volunteers(100)
+    headers = [volunteer_headers(volunteer) for volunteer in volunteers]
+    latencies, status_codes = [], Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(10)
+
+    def worker(batch):
+        barrier.wait()
+        for request_headers in batch:
+            start = time.perf_counter()
+            status_code = client.post(f"/api/volunteers/{event_id}/join", headers=request_headers).status_code
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                status_codes[status_code] += 1
+
+    threads = [threading.Thread(target=worker, args=(headers[i::10],)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert status_codes == Counter({201: 100})
+    assert _stored_counts(event_id) == (100, 100)
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    assert p99 < JOIN_P99_BUDGET_SECONDS, f"p99 {p99 * 1000:.0f} ms"
@@ -0,0 +1,40 @@
+"""
+Totales de donaciones por evento en el listado (include_donations, user-017).
+"""
+from datetime import datetime, timedelta
+
+from api.models import db, Event, Donation
+from api.services.donation_service import DonationService
+
+
+def _complete(amount, donor, association, event_id, currency="EUR"):
+    donation = Donation(amount, donor.id, association.id, event_id=event_id)
+    donation.currency = currency
+    db.session.add(donation)
+    db.session.flush()
+    DonationService.mark_donation_completed(donation)
+
+
+def test_event_totals_are_split_by_currency(client, association, make_volunteers):
+    donor = make_volunteers(1)[0]
+    events = [
+        Event(title=f"Evento {i}", description="Descripción", city="Madrid", event_type="social",
+              date=datetime.now() + timedelta(days=i + 1), association_id=association.id)
+        for i in range(2)
+    ]
+    db.session.add_all(events)
+    db.session.flush()
+    _complete(10, donor, association, events[0].id)
+    _complete(5.5, donor, association, events[0].id)
+    _complete(20, donor, association, events[0].id, currency="USD")
+    db.session.commit()
+
+    response = client.get("/api/events/?limit=10&include_donations=true")
+    assert response.status_code == 200
+    donations = {event["id"]: event["donations"] for event in response.get_json()["events"]}
+
+    assert donations[events[0].id] == [
+        {"currency": "EUR", "total_amount": 15.5, "donation_count": 2},
+        {"currency": "USD", "total_amount": 20.0, "donation_count": 1},
+    ]
+    assert donations[events[1].id] == []
@@ -0,0 +1,40 @@
+"""
+Importación de eventos en bloque desde CSV (POST /api/events/bulk, user-008).
+"""
+import io
+from datetime import datetime, timedelta
+
+CSV_HEADER = "title,description,date,city,event_type,max_volunteers\n"
+
+
+def _csv_row(title):
+    date = (datetime.now() + timedelta(days=10)).strftime("%Y-%m-%d %H:%M:%S")
+    return f"{title},Descripción del evento,{date},Sevilla,social,5\n"
+
+
+def _upload(client, headers, content):
+    return client.post("/api/events/bulk", headers=headers,
+                       data={"file": (io.BytesIO(content), "eventos.csv")},
+                       content_type="multipart/form-data")
+
+
+def test_bulk_import_from_csv_file(client, association, association_headers):
+    content = (CSV_HEADER + _csv_row("Recogida de alimentos") + _csv_row("Limpieza del río")).encode("utf-8-sig")
+    response = _upload(client, association_headers(association), content)
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()["created"] == 2
+
+
+def test_bulk_import_rejects_non_utf8_file(client, association, association_headers):
+    content = (CSV_HEADER + _csv_row("Campaña de invierno")).encode("latin-1")
+    response = _upload(client, association_headers(association), content)
+    assert response.status_code == 400
+    assert "UTF-8" in response.get_json()["error"]
+
+
+def test_bulk_import_rejects_malformed_csv(client, association, association_headers):
+    # Un campo entre comillas sin cerrar se come el resto del fichero y supera el límite de csv
+    content = (CSV_HEADER + '"' + "x" * 200_000 + "\n").encode("utf-8")
+    response = _upload(client, association_headers(association), content)
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("El archivo CSV no es válido")
@@ -0,0 +1,66 @@
+"""
+Ranking bayesiano de asociaciones (flask refresh-leaderboard y GET /api/associations/leaderboard, user-023).
+"""
+import pytest
+
+from api.cache import response_lru
+from api.models import db, User, Association
+from api.services.leaderboard_service import LeaderboardService
+
+# Nombre: (suma de valoraciones, número de valoraciones)
+RATING_TOTALS = {
+    "Una de cinco": (5, 1),
+    "Muchas altas": (96, 20),
+    "Muchas bajas": (90, 30),
+    "Sin valorar": (0, 0),
+}
+
+
+@pytest.fixture
+def rated_associations(app):
+    ids = {}
+    for i, (name, (rating_sum, rating_count)) in enumerate(RATING_TOTALS.items()):
+        owner = User(email=f"ranking{i}@example.com", password="x", name=name)
+        db.session.add(owner)
+        db.session.flush()
+        association = Association(name=name, cif=f"G1000000{i}", description="Descripción",
+                                  contact_email=owner.email, user_id=owner.id)
+        association.rating_sum = rating_sum
+        association.rating_count = rating_count
+        db.session.add(association)
+        db.session.flush()
+        ids[name] = association.id
+    db.session.commit()
+    return ids
+
+
+def _leaderboard(client):
+    response_lru.clear()
+    response = client.get("/api/associations/leaderboard")
+    assert response.status_code == 200
+    return response.get_json()["leaderboard"]
+
+
+def test_bayesian_score_pulls_few_ratings_towards_the_mean(client, rated_associations):
+    assert LeaderboardService.refresh() == 3
+
+    leaderboard = _leaderboard(client)
+    # Media global 191/51 y peso por defecto 51/3 = 17: un único 5 no supera a veinte 4,8
+    assert [entry["association_name"] for entry in leaderboard] == ["Muchas altas", "Una de cinco", "Muchas bajas"]
+    assert [entry["rank"] for entry in leaderboard] == [1, 2, 3]
+    assert leaderboard[1]["average_rating"] == 5.0
+    global_mean = 191 / 51
+    assert leaderboard[0]["score"] == round((17 * global_mean + 96) / (17 + 20), 3)
+
+
+def test_refresh_replaces_previous_ranking(client, rated_associations):
+    LeaderboardService.refresh()
+    _leaderboard(client)
+
+    association = db.session.get(Association, rated_associations["Muchas bajas"])
+    association.rating_sum, association.rating_count = 0, 0
+    db.session.commit()
+    LeaderboardService.refresh()
+
+    names = [entry["association_name"] for entry in _leaderboard(client)]
+    assert names == ["Una de cinco", "Muchas altas"]
@@ -0,0 +1,100 @@
+"""
+Planes de ejecución de las consultas más frecuentes (índices de user-003).
+
+Se capturan las SELECT que lanza cada endpoint y se ejecuta EXPLAIN sobre
+ellas con enable_seqscan desactivado: con tablas de prueba tan pequeñas el
+planificador preferiría siempre el recorrido secuencial, así que solo queda
+un Seq Scan si ningún índice sirve a la consulta. Necesita PostgreSQL.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from api.cache import response_lru
+from api.models import db, Event, Donation, Rating
+from api.models.donation import DonationStatus
+
+
+@pytest.fixture(autouse=True)
+def require_postgresql(app):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("Necesita TEST_DATABASE_URL apuntando a PostgreSQL")
+
+
+@pytest.fixture
+def seeded(association, make_volunteers):
+    volunteer = make_volunteers(1)[0]
+    now = datetime.now()
+    events = [
+        Event(title=f"Evento {i}", description="Descripción", city="Madrid", event_type="social",
+              date=now + timedelta(days=i - 2), association_id=association.id)
+        for i in range(5)
+    ]
+    db.session.add_all(events)
+    db.session.flush()
+
+    for i in range(3):
+        donation = Donation(amount=10 + i, donor_id=volunteer.id, association_id=association.id)
+        donation.status = DonationStatus.COMPLETED
+        donation.completed_at = now
+        db.session.add(donation)
+    db.session.add(Rating(rating=4, user_id=volunteer.id, association_id=association.id, event_id=events[0].id))
+    db.session.commit()
+    return association.id
+
+
+def _query_plans(client, url, table):
+    """Planes (texto) de las SELECT sobre `table` que ejecuta GET `url`"""
+    # Sin respuestas cacheadas de otros tests: la vista tiene que consultar la base de datos
+    response_lru.clear()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and f"FROM {table}" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        assert client.get(url).status_code == 200
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+
+    assert statements, f"GET {url} no consulta {table}"
+    plans = []
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql("SET enable_seqscan = off")
+        for statement, parameters in statements:
+            rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters).scalars().all()
+            plans.append("\n".join(rows))
+    return plans
+
+
+def _assert_uses_index(plans, index_name):
+    for plan in plans:
+        assert "Seq Scan" not in plan, plan
+    assert any(index_name in plan for plan in plans), "\n\n".join(plans)
+
+
+def test_event_list_uses_active_date_index(client, seeded):
+    plans = _query_plans(client, "/api/events/", "events")
+    _assert_uses_index(plans, "ix_events_active_date_id")
+
+
+def test_event_cursor_page_uses_active_date_index(client, seeded):
+    first_page = client.get("/api/events/?limit=2").get_json()
+    cursor = first_page["next_cursor"]
+    assert cursor
+
+    plans = _query_plans(client, f"/api/events/?limit=2&cursor={cursor}", "events")
+    _assert_uses_index(plans, "ix_events_active_date_id")
+
+
+def test_donation_statistics_use_association_index(client, seeded):
+    plans = _query_plans(client, f"/api/donations/statistics?association_id={seeded}", "donations")
+    _assert_uses_index(plans, "ix_donations_association_created")
+
+
+def test_association_rating_feed_uses_association_index(client, seeded):
+    plans = _query_plans(client, f"/api/ratings/association/{seeded}", "ratings")
+    _assert_uses_index(plans, "ix_ratings_association_created")
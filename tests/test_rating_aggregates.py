@@ -0,0 +1,54 @@
+"""
+Contadores de valoraciones de la asociación (rating_sum / rating_count)
+con ediciones simultáneas de la misma valoración. Necesita PostgreSQL.
+"""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.models import db, Association, Event, Rating
+from api.services.rating_service import RatingService
+
+
+@pytest.fixture(autouse=True)
+def require_postgresql(app):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("Necesita TEST_DATABASE_URL apuntando a PostgreSQL")
+
+
+def test_concurrent_edits_keep_rating_sum_consistent(app, association, make_volunteers):
+    volunteer = make_volunteers(1)[0]
+    event = Event(title="Reparto de comida", description="Descripción", city="Sevilla", event_type="social",
+                  date=datetime.now() - timedelta(days=7), association_id=association.id)
+    db.session.add(event)
+    db.session.flush()
+    rating = Rating(rating=3, user_id=volunteer.id, association_id=association.id, event_id=event.id)
+    db.session.add(rating)
+    association.rating_sum, association.rating_count = 3, 1
+    db.session.commit()
+    rating_id, association_id = rating.id, association.id
+
+    # Menos hilos que conexiones del pool: todos esperan en la barrera con la suya abierta
+    new_values = [1, 2, 4, 5, 1, 2, 4, 5, 2, 4]
+    barrier = threading.Barrier(len(new_values))
+
+    def edit(value):
+        with app.app_context():
+            # Como en el controlador: la valoración ya está en la sesión antes de editarla
+            db.session.get(Rating, rating_id)
+            barrier.wait()
+            RatingService.update_rating(rating_id, value)
+            db.session.remove()
+
+    threads = [threading.Thread(target=edit, args=(value,)) for value in new_values]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.expire_all()
+    final_rating = db.session.get(Rating, rating_id).rating
+    association = db.session.get(Association, association_id)
+    assert association.rating_count == 1
+    assert association.rating_sum == final_rating
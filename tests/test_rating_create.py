@@ -0,0 +1,75 @@
+"""
+Crear valoraciones con POST /api/ratings/ (comprobación e inserción en una sola sentencia, user-022).
+"""
+from datetime import datetime, timedelta
+
+from api.models import db, Association, Event, EventVolunteer, Rating
+
+
+def _event(association, days_from_now):
+    event = Event(title="Banco de alimentos", description="Descripción", city="Bilbao", event_type="social",
+                  date=datetime.now() + timedelta(days=days_from_now), association_id=association.id)
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def _enroll(event_id, volunteer):
+    db.session.add(EventVolunteer(event_id=event_id, volunteer_id=volunteer.id))
+    db.session.commit()
+
+
+def _rate(client, headers, association, event_id, rating=4):
+    return client.post("/api/ratings/", headers=headers,
+                       json={"association_id": association.id, "event_id": event_id, "rating": rating})
+
+
+def _association_totals(association_id):
+    db.session.expire_all()
+    association = db.session.get(Association, association_id)
+    return association.rating_sum, association.rating_count
+
+
+def test_volunteer_rates_finished_event(client, association, make_volunteers, volunteer_headers):
+    volunteer = make_volunteers(1)[0]
+    event_id = _event(association, days_from_now=-3)
+    _enroll(event_id, volunteer)
+
+    response = _rate(client, volunteer_headers(volunteer), association, event_id, rating=4)
+    assert response.status_code == 201
+    assert response.get_json()["rating"]["event_id"] == event_id
+    assert _association_totals(association.id) == (4, 1)
+
+
+def test_second_rating_for_same_event_is_forbidden(client, association, make_volunteers, volunteer_headers):
+    volunteer = make_volunteers(1)[0]
+    event_id = _event(association, days_from_now=-3)
+    _enroll(event_id, volunteer)
+
+    assert _rate(client, volunteer_headers(volunteer), association, event_id, rating=5).status_code == 201
+    response = _rate(client, volunteer_headers(volunteer), association, event_id, rating=1)
+    assert response.status_code == 403
+    assert response.get_json()["success"] is False
+
+    # Ni segunda fila ni segunda suma en los contadores
+    assert Rating.query.filter_by(event_id=event_id).count() == 1
+    assert _association_totals(association.id) == (5, 1)
+
+
+def test_non_volunteer_cannot_rate(client, association, make_volunteers, volunteer_headers):
+    volunteer, outsider = make_volunteers(2)
+    event_id = _event(association, days_from_now=-3)
+    _enroll(event_id, volunteer)
+
+    response = _rate(client, volunteer_headers(outsider), association, event_id)
+    assert response.status_code == 403
+    assert Rating.query.count() == 0
+    assert _association_totals(association.id) == (0, 0)
+
+
+def test_unfinished_event_cannot_be_rated(client, association, make_volunteers, volunteer_headers):
+    volunteer = make_volunteers(1)[0]
+    event_id = _event(association, days_from_now=3)
+    _enroll(event_id, volunteer)
+
+    assert _rate(client, volunteer_headers(volunteer), association, event_id).status_code == 403
@@ -0,0 +1,65 @@
+"""
+Listado de valoraciones de una asociación: paginación por cursor e histograma (user-021).
+"""
+from datetime import datetime, timedelta
+
+from api.cache import response_lru
+from api.models import db, Event, Rating
+
+RATING_VALUES = [1, 1.4, 1.5, 2.6, 3, 3.5, 4.49, 4.5, 5]
+
+
+def _seed_ratings(association, volunteers):
+    """Una valoración por voluntario; las dos primeras con el mismo created_at para probar el desempate por id"""
+    event = Event(title="Taller de lectura", description="Descripción", city="Zaragoza", event_type="cultural",
+                  date=datetime.now() - timedelta(days=30), association_id=association.id)
+    db.session.add(event)
+    db.session.flush()
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    for i, (volunteer, value) in enumerate(zip(volunteers, RATING_VALUES)):
+        created_at = base + timedelta(minutes=max(i, 1))
+        db.session.add(Rating(rating=value, user_id=volunteer.id, association_id=association.id,
+                              event_id=event.id, created_at=created_at, updated_at=created_at))
+    db.session.commit()
+
+
+def _get_page(client, association_id, **params):
+    # Cada petición debe leer la base de datos, no una respuesta cacheada de otra página
+    response_lru.clear()
+    response = client.get(f"/api/ratings/association/{association_id}", query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_cursor_pages_cover_every_rating_once_newest_first(client, association, make_volunteers):
+    _seed_ratings(association, make_volunteers(len(RATING_VALUES)))
+    expected = [(r.created_at, r.id) for r in Rating.query.all()]
+    expected.sort(reverse=True)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = _get_page(client, association.id, **params)
+        assert len(page["ratings"]) <= 2
+        seen.extend(rating["id"] for rating in page["ratings"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == [rating_id for _, rating_id in expected]
+
+
+def test_invalid_cursor_is_rejected(client, association):
+    response = client.get(f"/api/ratings/association/{association.id}?cursor=no-es-un-cursor")
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Cursor de paginación inválido"
+
+
+def test_histogram_rounds_to_nearest_star(client, association, make_volunteers):
+    _seed_ratings(association, make_volunteers(len(RATING_VALUES)))
+
+    page = _get_page(client, association.id)
+    # 1, 1.4 -> 1; 1.5 -> 2; 2.6, 3 -> 3; 3.5, 4.49 -> 4; 4.5, 5 -> 5
+    assert page["histogram"] == {"1": 2, "2": 1, "3": 2, "4": 2, "5": 2}
@@ -0,0 +1,125 @@
+"""
+Bandeja de webhooks de Stripe: deduplicación, reintentos con espera y fallo definitivo (user-015).
+"""
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api.models import db, Donation, StripeWebhookEvent
+from api.models.donation import DonationStatus
+from api.models.stripe_webhook_event import WebhookEventStatus
+from api.services.stripe_webhook_service import StripeWebhookService, MAX_WEBHOOK_ATTEMPTS
+
+WEBHOOK_SECRET = "whsec_test"
+
+
+def _utcnow():
+    # Las fechas se guardan sin zona horaria, en UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _checkout_completed(event_id, session_id):
+    return json.dumps({
+        "id": event_id,
+        "object": "event",
+        "type": "checkout.session.completed",
+        "data": {"object": {"id": session_id, "object": "checkout.session"}},
+    })
+
+
+def _signature(payload):
+    timestamp = int(time.time())
+    digest = hmac.new(WEBHOOK_SECRET.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def _store(payload):
+    event = json.loads(payload)
+    inbox_id = StripeWebhookService.store_event(event["id"], event["type"], payload)
+    db.session.commit()
+    return inbox_id
+
+
+def _make_due(inbox_id):
+    """Adelantar el reintento programado para no esperar la espera real"""
+    db.session.get(StripeWebhookEvent, inbox_id).next_attempt_at = _utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+@pytest.fixture
+def pending_donation(association, make_volunteers):
+    donation = Donation(25, make_volunteers(1)[0].id, association.id)
+    donation.stripe_session_id = "cs_test_1"
+    db.session.add(donation)
+    db.session.commit()
+    return donation
+
+
+def test_redelivered_event_is_stored_once(client, monkeypatch):
+    monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", WEBHOOK_SECRET)
+    payload = _checkout_completed("evt_dup", "cs_desconocida")
+
+    for _ in range(2):
+        response = client.post("/api/donations/webhook", data=payload,
+                               headers={"Stripe-Signature": _signature(payload)}, content_type="application/json")
+        assert response.status_code == 200
+
+    assert StripeWebhookEvent.query.filter_by(stripe_event_id="evt_dup").count() == 1
+
+
+def test_invalid_signature_is_rejected(client, monkeypatch):
+    monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", WEBHOOK_SECRET)
+    payload = _checkout_completed("evt_firma", "cs_test")
+    response = client.post("/api/donations/webhook", data=payload,
+                           headers={"Stripe-Signature": "t=1,v1=deadbeef"}, content_type="application/json")
+    assert response.status_code == 400
+    assert StripeWebhookEvent.query.count() == 0
+
+
+def test_store_event_ignores_duplicates(app):
+    payload = _checkout_completed("evt_1", "cs_test")
+    assert _store(payload) is not None
+    assert _store(payload) is None
+
+
+def test_pending_event_completes_donation(app, pending_donation):
+    inbox_id = _store(_checkout_completed("evt_ok", "cs_test_1"))
+
+    assert StripeWebhookService.process_pending() == {"processed": 1, "retry": 0, "failed": 0}
+    inbox_event = db.session.get(StripeWebhookEvent, inbox_id)
+    assert inbox_event.status == WebhookEventStatus.PROCESSED
+    assert inbox_event.next_attempt_at is None
+    assert db.session.get(Donation, pending_donation.id).status == DonationStatus.COMPLETED
+
+
+def test_failed_event_is_retried_with_backoff_then_marked_failed(app):
+    inbox_id = _store(_checkout_completed("evt_ko", "cs_sin_donacion"))
+
+    assert StripeWebhookService.process_pending() == {"processed": 0, "retry": 1, "failed": 0}
+    inbox_event = db.session.get(StripeWebhookEvent, inbox_id)
+    assert inbox_event.status == WebhookEventStatus.PENDING
+    assert inbox_event.next_attempt_at > _utcnow()
+    assert "cs_sin_donacion" in inbox_event.last_error
+
+    # Hasta que llega su hora no se vuelve a leer
+    assert StripeWebhookService.process_pending() == {"processed": 0, "retry": 0, "failed": 0}
+
+    for _ in range(MAX_WEBHOOK_ATTEMPTS - 2):
+        _make_due(inbox_id)
+        assert StripeWebhookService.process_pending()["retry"] == 1
+
+    _make_due(inbox_id)
+    assert StripeWebhookService.process_pending() == {"processed": 0, "retry": 0, "failed": 1}
+    inbox_event = db.session.get(StripeWebhookEvent, inbox_id)
+    assert inbox_event.status == WebhookEventStatus.FAILED
+    assert inbox_event.attempts == MAX_WEBHOOK_ATTEMPTS
+
+
+def test_retry_delay_doubles_up_to_the_cap():
+    delays = [StripeWebhookService.retry_delay(attempts).total_seconds() for attempts in range(1, 10)]
+    assert delays[:4] == [10, 20, 40, 80]
+    assert delays[-1] == 15 * 60
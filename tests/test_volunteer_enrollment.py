@@ -0,0 +1,52 @@
+"""
+Apuntarse y desapuntarse de eventos (POST join / DELETE leave, user-007).
+"""
+from datetime import datetime, timedelta
+
+from api.models import db, Event
+
+
+def _create_event(association, max_volunteers):
+    event = Event(title="Reparto de comida", description="Descripción", city="Valencia", event_type="social",
+                  date=datetime.now() + timedelta(days=3), association_id=association.id,
+                  max_volunteers=max_volunteers)
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def test_join_twice_reports_already_joined(client, association, make_volunteers, volunteer_headers):
+    event_id = _create_event(association, max_volunteers=5)
+    headers = volunteer_headers(make_volunteers(1)[0])
+
+    assert client.post(f"/api/volunteers/{event_id}/join", headers=headers).status_code == 201
+    response = client.post(f"/api/volunteers/{event_id}/join", headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Ya estás apuntado a este evento"
+
+
+def test_join_full_event_when_already_joined(client, association, make_volunteers, volunteer_headers):
+    event_id = _create_event(association, max_volunteers=1)
+    joined, late = make_volunteers(2)
+
+    assert client.post(f"/api/volunteers/{event_id}/join", headers=volunteer_headers(joined)).status_code == 201
+    response = client.post(f"/api/volunteers/{event_id}/join", headers=volunteer_headers(joined))
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Ya estás apuntado a este evento"
+
+    response = client.post(f"/api/volunteers/{event_id}/join", headers=volunteer_headers(late))
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Este evento ha alcanzado su número máximo de voluntarios"
+
+
+def test_leave_frees_the_seat(client, association, make_volunteers, volunteer_headers):
+    event_id = _create_event(association, max_volunteers=1)
+    first, second = make_volunteers(2)
+
+    assert client.post(f"/api/volunteers/{event_id}/join", headers=volunteer_headers(first)).status_code == 201
+    assert client.delete(f"/api/volunteers/{event_id}/leave", headers=volunteer_headers(first)).status_code == 200
+    assert client.delete(f"/api/volunteers/{event_id}/leave", headers=volunteer_headers(first)).status_code == 404
+    assert client.post(f"/api/volunteers/{event_id}/join", headers=volunteer_headers(second)).status_code == 201
+
+    db.session.expire_all()
+    assert db.session.get(Event, event_id).volunteers_count == 1